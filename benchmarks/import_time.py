@@ -0,0 +1,77 @@
+"""
+Measures the import time of the dsp package and checks that heavy dependencies are only loaded when they are used.
+
+Each statement runs in a fresh interpreter, so nothing is cached between measurements. The script exits with an error if a budget is exceeded or a heavy module is imported too early.
+
+Usage:
+    python benchmarks/import_time.py [--runs N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+
+ROOT_DIR = os.path.realpath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Sentencia, presupuesto en segundos (None para solo medir), módulos que no deben cargarse
+CASES = [
+    ('import dsp', 0.05, ['numpy', 'scipy', 'matplotlib']),
+    ('from dsp import Signal', None, ['scipy', 'matplotlib']),
+    ('from dsp import Generator', None, ['scipy', 'matplotlib']),
+    ('import dsp.filter', None, ['scipy', 'matplotlib']),
+    ('import dsp.grapher', None, ['scipy', 'matplotlib'])
+]
+
+
+def measure(statement, forbidden_modules):
+    code = (
+        'import sys, time\n'
+        't_0 = time.perf_counter()\n'
+        f'{statement}\n'
+        'elapsed = time.perf_counter() - t_0\n'
+        f'loaded = [m for m in {forbidden_modules!r} if m in sys.modules]\n'
+        'print(elapsed, ",".join(loaded))\n'
+    )
+
+    output = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd = ROOT_DIR,
+        capture_output = True,
+        text = True,
+        check = True
+    ).stdout.split()
+
+    elapsed = float(output[0])
+    loaded = output[1].split(',') if len(output) > 1 else []
+
+    return elapsed, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Import time benchmark of the dsp package.')
+    parser.add_argument('--runs', type = int, default = 5, help = 'Runs per statement, the best one is reported.')
+    arguments = parser.parse_args()
+    failures = []
+
+    for statement, budget, forbidden_modules in CASES:
+        results = [measure(statement, forbidden_modules) for i in range(0, arguments.runs, 1)]
+        best = min(elapsed for elapsed, loaded in results)
+        loaded = results[0][1]
+        print(f'{statement:<30} {best * 1000:8.1f} ms')
+
+        if budget is not None and budget < best:
+            failures.append(f'{statement} took {best * 1000:.1f} ms, the budget is {budget * 1000:.1f} ms.')
+
+        if loaded:
+            failures.append(f'{statement} imported {", ".join(loaded)}.')
+
+    for failure in failures:
+        print(failure, file = sys.stderr)
+
+    return int(bool(failures))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
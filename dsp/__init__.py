@@ -0,0 +1,59 @@
+"""
+Digital signal processing package.
+
+Submodules and classes are imported the first time they are accessed, so `import dsp` is almost instant and heavy dependencies, such as scipy and matplotlib, are only loaded by the functions that use them.
+"""
+
+import importlib
+
+
+_submodules = [
+    'archive',
+    'convolver',
+    'filter',
+    'functions',
+    'generator',
+    'grapher',
+    'level_meter',
+    'oscillator',
+    'signal',
+    'signal_archive',
+    'sos_filter',
+    'stft',
+    'stream',
+    'ticks'
+]
+
+_classes = {
+    'Archive': 'archive',
+    'Convolver': 'convolver',
+    'Generator': 'generator',
+    'Grapher': 'grapher',
+    'LevelMeter': 'level_meter',
+    'Oscillator': 'oscillator',
+    'SOSFilter': 'sos_filter',
+    'STFT': 'stft',
+    'Signal': 'signal',
+    'SignalArchive': 'signal_archive',
+    'Stream': 'stream',
+    'Ticks': 'ticks'
+}
+
+__all__ = _submodules + list(_classes)
+
+
+def __getattr__(name):
+    if name in _submodules:
+        return importlib.import_module('dsp.' + name)
+
+    if name in _classes:
+        value = getattr(importlib.import_module('dsp.' + _classes[name]), name)
+        globals()[name] = value # Las siguientes lecturas ya no pasan por __getattr__
+
+        return value
+
+    raise AttributeError(f"module 'dsp' has no attribute '{name}'")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
\ No newline at end of file
@@ -1,14 +1,23 @@
 import numpy as np
 import os
 import datetime
+import atexit
+import queue
+import threading
+from dsp.signal_archive import SignalArchive
 
 
 class Archive:
 
-    def __init__(self):
+    def __init__(self, background_workers = 0, queue_size = 16):
         self._resources_path = os.path.realpath(os.path.join(self.get_root_dir(), '..', 'resources'))
         self._output_path = os.path.realpath(os.path.join(self.get_root_dir(), '..', 'output'))
         self._save_figure_kwargs = {'bbox_inches': 'tight', 'dpi': 300, 'transparent': True}
+        self._background_workers = background_workers
+        self._queue_size = queue_size
+        self._queue = None # Cola de escrituras pendientes, creada con el primer guardado en segundo plano
+        self._threads = []
+        self._signal_archives = {} # Archivos de señales abiertos, por ruta, para no volver a leer su índice
 
 
 #######################
@@ -40,6 +49,24 @@ class Archive:
     def save_figure_kwargs(self, save_figure_kwargs):
         self._save_figure_kwargs = save_figure_kwargs
 
+    @property
+    def background_workers(self):
+        return self._background_workers
+
+    @background_workers.setter
+    def background_workers(self, background_workers):
+        self.close()
+        self._background_workers = background_workers
+
+    @property
+    def queue_size(self):
+        return self._queue_size
+
+    @queue_size.setter
+    def queue_size(self, queue_size):
+        self.close()
+        self._queue_size = queue_size
+
 
 #############
 ## METHODS ##
@@ -56,27 +83,223 @@ class Archive:
 
 
     def save_plot(self, graph, file_name = None):
+        """
+        Saves a figure as a PNG file at the output_path.
+
+        Args:
+            graph (matplotlib.figure.Figure) Figure that is going to be saved.
+            file_name (string, optional) Name of the file, without the .png extension. The default is the current date and the user name.
+
+        Returns:
+            None, or a concurrent.futures.Future of the write if background_workers is positive. In that case, the figure must not be modified until the write is done.
+        """
+
         if file_name is None:
             file_name = str(datetime.datetime.now()) + ' by ' + os.getlogin()
 
         file_path = os.path.join(self.output_path, file_name + '.png')
+
+        if 0 < self.background_workers:
+            return self.submit(graph.savefig, file_path, **self.save_figure_kwargs)
+
         graph.savefig(file_path, **self.save_figure_kwargs)
 
         return
 
 
-    def save_array(self, array):
+    def save_array(self, array, file_name):
         """
         Saves a given numpy array into a file at the hard drive.
 
         Args:
             array (numpy.ndarray) Data that is going to be saved.
+            file_name (string) Name of the file, without the .npy extension.
 
         Returns:
-            None
+            None, or a concurrent.futures.Future of the write if background_workers is positive. In that case, the array must not be modified until the write is done.
         """
 
-        file_path = os.path.join(self.output_path, self.file_name)
+        file_path = os.path.join(self.output_path, file_name)
+
+        if 0 < self.background_workers:
+            return self.submit(np.save, file_path, array)
+
         np.save(file_path, array)
 
-        return
\ No newline at end of file
+        return
+
+
+    def save_signals(self, signals, file_name, compress = False):
+        """
+        Stores many signals with their metadata in a single indexed file, see SignalArchive. If the file exists, the signals are appended to it.
+
+        Args:
+            signals (dict or list of Signal) Signals by name. A list is stored under the description of each signal.
+            file_name (string) Name of the file, without the .dsp extension.
+            compress (bool or collection of string, optional) Whether to compress the arrays with zlib, for every signal, or the names of the signals to compress. The default is False.
+
+        Returns:
+            (SignalArchive) The archive file.
+        """
+
+        if not isinstance(signals, dict):
+            signals_list = list(signals)
+            signals = {signal.description: signal for signal in signals_list}
+
+            if len(signals) < len(signals_list):
+                raise ValueError('The descriptions of the signals are not unique. Give them as a dict by name.')
+
+        signal_archive = self.signal_archive(file_name)
+        signal_archive.append(signals, compress)
+
+        return signal_archive
+
+
+    def load_signal(self, file_name, name, mmap_mode = 'r'):
+        """
+        Loads one signal from a file written by save_signals(). The index of each file is read once and kept by signal_archive(), so each load only reads the file header and the bytes of that signal.
+
+        Args:
+            file_name (string) Name of the file, without the .dsp extension.
+            name (string) Name of the signal.
+            mmap_mode (string, optional) Memory-map mode for uncompressed arrays. If None, the arrays are read into RAM. The default is 'r'.
+
+        Returns:
+            (Signal) The stored signal.
+        """
+
+        return self.signal_archive(file_name).load(name, mmap_mode)
+
+
+    def signal_archive(self, file_name):
+        """
+        Gives the SignalArchive of a file at the output_path. It is created once per path, so its index is parsed only the first time and whenever another writer appends to the file.
+
+        Args:
+            file_name (string) Name of the file, without the .dsp extension.
+
+        Returns:
+            (SignalArchive) The archive file.
+        """
+
+        file_path = os.path.join(self.output_path, file_name + '.dsp')
+
+        if file_path not in self._signal_archives:
+            self._signal_archives[file_path] = SignalArchive(file_path)
+
+        return self._signal_archives[file_path]
+
+
+    def submit(self, function, *args, **kwargs):
+        """
+        Queues a writing function to be called by the background writer threads, which are started by the first call. If the queue is full, it blocks until a worker takes a pending write, so the computation never runs too far ahead of the disk.
+
+        The threads are daemonic, so they never keep the interpreter alive by themselves, but close() is registered with atexit when they start: writes still queued when the script ends normally are completed before exiting. Writes are lost only if the process is killed or ends through os._exit(), and errors of the writes done at exit are not reported, so call close() or use the archive as a context manager to get them through the futures.
+
+        Args:
+            function (callable) Function that writes a file.
+            *args, **kwargs Arguments of the function.
+
+        Returns:
+            (concurrent.futures.Future) Future of the function's result. Errors raised by the function are given by its result() or exception().
+        """
+
+        from concurrent.futures import Future
+
+        if self._queue is None:
+            self._queue = queue.Queue(maxsize = self.queue_size)
+            self._threads = [threading.Thread(target = self.write_jobs, daemon = True) for i in range(0, max(self.background_workers, 1), 1)]
+
+            for thread in self._threads:
+                thread.start()
+
+            atexit.register(self.close) # Completa las escrituras pendientes si el script termina sin close()
+
+        future = Future()
+        self._queue.put((future, function, args, kwargs))
+
+        return future
+
+
+    def write_jobs(self):
+        """
+        Loop of a background writer thread. It calls the queued writes until it takes the stop mark put by close().
+
+        Returns:
+            None.
+        """
+
+        while True:
+            job = self._queue.get()
+
+            try:
+                if job is None:
+                    return
+
+                future, function, args, kwargs = job
+
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(function(*args, **kwargs))
+                    except BaseException as error:
+                        future.set_exception(error)
+            finally:
+                self._queue.task_done()
+
+
+    def flush(self):
+        """
+        Waits until every queued write is done.
+
+        Returns:
+            None.
+        """
+
+        if self._queue is not None:
+            self._queue.join()
+
+        return
+
+
+    def close(self):
+        """
+        Waits for the queued writes and stops the background writer threads. A later save starts them again.
+
+        Returns:
+            None.
+        """
+
+        if self._queue is None:
+            return
+
+        self.flush()
+
+        for thread in self._threads:
+            self._queue.put(None)
+
+        for thread in self._threads:
+            thread.join()
+
+        self._queue = None
+        self._threads = []
+        atexit.unregister(self.close)
+
+        return
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+        return False
+
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_queue'] = None # La cola y los hilos no se copian a otros procesos
+        state['_threads'] = []
+
+        return state
\ No newline at end of file
@@ -0,0 +1,260 @@
+import numpy as np
+from dsp.signal import Signal
+from dsp.stream import Stream
+
+
+class Convolver:
+
+    def __init__(self, kernel, block_size = 4096, partitioned = False):
+        self._kernel = kernel
+        self._block_size = block_size
+        self._partitioned = partitioned
+        self._kernel_spectra = {} # Espectros del núcleo, por tamaño de FFT
+        self._partitions_spectrum = None
+        self.reset()
+
+
+#######################
+## GETTERS & SETTERS ##
+#######################
+
+
+    @property
+    def kernel(self):
+        return self._kernel
+
+    @kernel.setter
+    def kernel(self, kernel):
+        self._kernel = kernel
+        self._kernel_spectra = {}
+        self._partitions_spectrum = None
+        self.reset()
+
+    @property
+    def block_size(self):
+        return self._block_size
+
+    @block_size.setter
+    def block_size(self, block_size):
+        self._block_size = block_size
+        self._partitions_spectrum = None
+        self.reset()
+
+    @property
+    def partitioned(self):
+        return self._partitioned
+
+    @partitioned.setter
+    def partitioned(self, partitioned):
+        self._partitioned = partitioned
+        self.reset()
+
+    @property
+    def kernel_array(self):
+        if isinstance(self._kernel, Signal):
+            return np.asarray(self._kernel.amplitude_array, dtype = float)
+
+        return np.asarray(self._kernel, dtype = float)
+
+
+#############
+## METHODS ##
+#############
+
+
+    def reset(self):
+        """
+        Clears the samples carried between blocks, as if no block had been processed. The kernel spectra remain cached.
+
+        Returns:
+            None.
+        """
+
+        self._tail = np.zeros(max(len(self.kernel_array) - 1, 0)) # Cola del solapamiento y suma
+        self._input_buffer = np.zeros(2 * self.block_size) # Bloque anterior y actual, para el solapamiento y descarte
+        self._delay_line = None # Espectros de los últimos bloques de entrada
+        self._delay_position = 0
+
+        return
+
+
+    def kernel_spectrum(self, nfft):
+        """
+        Returns the real FFT of the kernel padded to nfft samples. Spectra are cached by size, so consecutive blocks of the same length transform the kernel only once.
+
+        Args:
+            nfft (int) Length of the transform.
+
+        Returns:
+            (numpy.ndarray) Complex spectrum of nfft // 2 + 1 bins.
+        """
+
+        import scipy.fft
+
+        if nfft not in self._kernel_spectra:
+            self._kernel_spectra[nfft] = scipy.fft.rfft(self.kernel_array, nfft)
+
+        return self._kernel_spectra[nfft]
+
+
+    def partitions_spectrum(self):
+        """
+        Splits the kernel into partitions of block_size samples and returns their cached spectra, used by the uniformly partitioned mode.
+
+        Returns:
+            (numpy.ndarray) Complex array of shape (partitions, block_size + 1).
+        """
+
+        import scipy.fft
+
+        if self._partitions_spectrum is None:
+            kernel_array = self.kernel_array
+            number_of_partitions = max(int(np.ceil(len(kernel_array) / self.block_size)), 1)
+            partitions = np.zeros((number_of_partitions, self.block_size))
+            partitions.reshape(-1)[:len(kernel_array)] = kernel_array
+            self._partitions_spectrum = scipy.fft.rfft(partitions, 2 * self.block_size, axis = -1)
+
+        return self._partitions_spectrum
+
+
+    def process(self, block):
+        """
+        Convolves the next block of a stream with the kernel and returns as many output samples as the block has, carrying the rest of the convolution to the following calls.
+
+        In the default mode, blocks of any length are convolved with one FFT of about len(block) + len(kernel) samples and the tails are overlapped and added. That is efficient for blocks at least as long as the kernel, as the segments of convolve_blocks(), but streaming short blocks through a long kernel costs a kernel-sized FFT per block. In the partitioned mode, blocks must have block_size samples: the kernel is split into partitions of that size and each block only costs FFTs of 2 * block_size samples plus a product per partition, so the latency is one block even for kernels of several seconds.
+
+        Args:
+            block (numpy.ndarray) 1D block of input samples.
+
+        Returns:
+            (numpy.ndarray) Block of output samples, of the same length.
+        """
+
+        import scipy.fft
+
+        block = np.asarray(block, dtype = float)
+
+        if self.partitioned:
+            if len(block) != self.block_size:
+                raise ValueError('In the partitioned mode, blocks must have block_size samples.')
+
+            partitions_spectrum = self.partitions_spectrum()
+            number_of_partitions = len(partitions_spectrum)
+
+            if self._delay_line is None:
+                self._delay_line = np.zeros(partitions_spectrum.shape, dtype = complex)
+
+            self._input_buffer[:self.block_size] = self._input_buffer[self.block_size:]
+            self._input_buffer[self.block_size:] = block
+            self._delay_position = (self._delay_position + 1) % number_of_partitions
+            self._delay_line[self._delay_position] = scipy.fft.rfft(self._input_buffer)
+
+            order = (self._delay_position - np.arange(number_of_partitions)) % number_of_partitions # Bloque más reciente con la primera partición
+            Y = np.sum(self._delay_line[order] * partitions_spectrum, axis = 0)
+
+            return scipy.fft.irfft(Y, 2 * self.block_size)[self.block_size:]
+
+        number_of_samples = len(block)
+        output_length = number_of_samples + len(self._tail)
+        nfft = scipy.fft.next_fast_len(output_length, real = True)
+
+        accumulated = scipy.fft.irfft(scipy.fft.rfft(block, nfft) * self.kernel_spectrum(nfft), nfft)[:output_length]
+        accumulated[:len(self._tail)] += self._tail
+        self._tail = accumulated[number_of_samples:]
+
+        return accumulated[:number_of_samples]
+
+
+    def flush(self):
+        """
+        Returns the last len(kernel) - 1 samples of the convolution, which follow the end of the input, and clears the carried samples.
+
+        Returns:
+            (numpy.ndarray) Tail of the convolution.
+        """
+
+        tail_length = len(self.kernel_array) - 1
+
+        if self.partitioned:
+            number_of_blocks = int(np.ceil(tail_length / self.block_size))
+            zeros = np.zeros(self.block_size)
+            tail = np.concatenate([self.process(zeros) for i in range(0, number_of_blocks, 1)] + [np.array([])])[:tail_length]
+        else:
+            tail = self._tail
+
+        self.reset()
+
+        return tail
+
+
+    def convolve_blocks(self, source):
+        """
+        Convolves a whole source with the kernel, consuming and yielding it block by block, so hour-long inputs are processed with bounded memory. In the default mode, the input is read in segments of at least len(kernel) samples, so each FFT of about 2 * len(kernel) samples gives as many new output samples as the kernel has, and block_size only sets the length of the yielded blocks.
+
+        Args:
+            source (array, string or iterable of numpy.ndarray) Input samples, given as anything accepted by Stream.
+
+        Yields:
+            (numpy.ndarray) Consecutive blocks of the convolution, which has len(kernel) - 1 samples more than the input.
+        """
+
+        self.reset()
+        tail_length = len(self.kernel_array) - 1
+        number_of_samples = 0
+        produced_samples = 0
+
+        segment_size = self.block_size
+
+        if not self.partitioned:
+            segment_size = max(self.block_size, tail_length + 1) # Segmentos del largo del núcleo, en lugar de una FFT del núcleo por bloque
+
+        for segment in Stream(source, segment_size):
+            number_of_samples = number_of_samples + len(segment)
+
+            if self.partitioned and len(segment) < self.block_size:
+                segment = np.pad(segment, (0, self.block_size - len(segment))) # Los ceros agregados devuelven parte de la cola
+
+            output_segment = self.process(segment)[:number_of_samples + tail_length - produced_samples]
+            produced_samples = produced_samples + len(output_segment)
+
+            for start in range(0, len(output_segment), self.block_size):
+                yield output_segment[start:start + self.block_size]
+
+        missing = number_of_samples + tail_length - produced_samples
+
+        if 0 < missing:
+            tail = self.flush()[:missing]
+
+            for start in range(0, len(tail), self.block_size):
+                yield tail[start:start + self.block_size]
+        else:
+            self.reset()
+
+
+    def convolve(self, signal):
+        """
+        Convolves a signal with the kernel, such as a recording with a measured room impulse response.
+
+        Args:
+            signal (Signal) Input signal.
+
+        Returns:
+            (Signal) Convolution, with the time axis of the input extended by len(kernel) - 1 samples.
+        """
+
+        output_length = signal.number_of_samples + len(self.kernel_array) - 1
+        amplitude_array = np.empty(output_length)
+        start = 0
+
+        for output_block in self.convolve_blocks(signal.amplitude_array):
+            length = min(len(output_block), output_length - start)
+            amplitude_array[start:start + length] = output_block[:length]
+            start = start + length
+
+        convolution = Signal()
+        convolution.time_start = signal.time_start
+        convolution.time_step = signal.time_step
+        convolution.amplitude_array = amplitude_array
+        convolution.description = signal.description + ' * ' + (self.kernel.description if isinstance(self.kernel, Signal) else 'kernel')
+
+        return convolution
\ No newline at end of file
@@ -1,16 +1,10 @@
-from scipy import signal
 import numpy as np
+import functools
 import os
-import sys
-
-root_dir = os.path.dirname(__file__)
-python_functions_path = os.path.realpath(os.path.join(root_dir, '..', '..', 'python-functions'))
-sys.path.insert(0, python_functions_path)
-matplotlib_functions_path = os.path.realpath(os.path.join(root_dir, '..', '..', 'matplotlib-functions'))
-sys.path.insert(0, matplotlib_functions_path)
-
-import python_functions as py_fx
-import matplotlib_functions as plt_fx
+from dsp.stream import Stream
+from dsp.signal import Signal
+from dsp.sos_filter import SOSFilter
+from dsp.functions import round_significant
 
 
 def f_m(x, b=1, G=2, f_r=1000):
@@ -41,9 +35,9 @@ def f_m(x, b=1, G=2, f_r=1000):
     """
     
     if b%2 == 0:
-        f_m = round_array(f_r * G**(x/b + 1/(2*b)), sig_digits=5)
+        f_m = round_significant(f_r * G**(x/b + 1/(2*b)), significant_digits=5)
     else:
-        f_m = round_array(f_r * G**(x/b), sig_digits=5)
+        f_m = round_significant(f_r * G**(x/b), significant_digits=5)
     
     return f_m
 
@@ -80,7 +74,7 @@ def f_c(c, f_m, b=1, G=2):
     return f_c
 
 
-def bandpass_filter(x, f_s, b=1, G=2, N_order=3, worN=5120):
+def bandpass_filter(x, f_s, b=1, G=2, N_order=3, worN=5120, cache_dir=None):
     
     """
     Generates a bandpass filter using signal.butter() according to UNE-EN 61260 norm.
@@ -106,6 +100,9 @@ def bandpass_filter(x, f_s, b=1, G=2, N_order=3, worN=5120):
     worN : INTEGER, optional
         Number of frequencies computed by signal.sosfreqz(). The default is 5120.
     
+    cache_dir : STRING, optional
+        Folder of the on-disk design cache used by bandpass_sos(). The default is None, which only uses the in-memory cache.
+    
     Returns
     -------
     
@@ -122,13 +119,9 @@ def bandpass_filter(x, f_s, b=1, G=2, N_order=3, worN=5120):
         Array of phases of the filter.
     """
     
-    f_nyq = f_s / 2
-    f_1 = f_c(1, f_m(x, b, G), b, G)
-    f_2 = f_c(2, f_m(x, b, G), b, G)
-    f_1_norm = f_1 / f_nyq
-    f_2_norm = f_2 / f_nyq
+    from scipy import signal # Importado al usarse, para que importar dsp no cargue scipy
     
-    sos = signal.butter(N_order, [f_1_norm, f_2_norm], btype='band', output='sos')
+    sos = bandpass_sos(x, f_s, b, G, N_order, cache_dir)
     omega_k, H = signal.sosfreqz(sos, worN)
     f_k = (omega_k/(2*np.pi))*f_s
     H_mag = 20*np.log10(abs(H))
@@ -137,6 +130,84 @@ def bandpass_filter(x, f_s, b=1, G=2, N_order=3, worN=5120):
     return sos, f_k, H_mag, H_phase
 
 
+def bandpass_sos(x, f_s, b=1, G=2, N_order=3, cache_dir=None):
+    
+    """
+    Designs the second-order sections of the bandpass filter of bandpass_filter(), without computing its frequency response. Designs are kept in an in-memory LRU cache and, optionally, in an on-disk store, so repeated analyses with the same parameters do not run signal.butter() again.
+
+    Parameters
+    ----------
+    
+    x : INTEGER
+        Determines which band's central frequencies are going to be calculated. The index x=0 generates the reference frequency, 1k Hz.
+        
+    f_s : INTEGER
+        Sampling rate, which determines the Nyquist frequency.
+    
+    b : INTEGER, optional
+        Positive integer that determines the bandwith. The default is 1.
+    
+    G : FLOAT, optional
+        Octave ratio. Usual values are 2 or 10^(3/10). The default is 2.
+    
+    N_order : INTEGER, optional
+        The order of the filter. Parameter of signal.butter(). The default is 3.
+    
+    cache_dir : STRING, optional
+        Folder where designs are stored as .npy files and looked up before designing them. The default is None, which only uses the in-memory cache.
+    
+    Returns
+    -------
+    
+    sos : ARRAY
+        Array of second-order filter coefficients.
+    """
+    
+    sos = cached_bandpass_sos(int(x), float(f_s), int(b), float(G), int(N_order), cache_dir).copy() # Con tipos de Python, np.float64 y float comparten entrada; la copia protege el cache
+    
+    return sos
+
+
+@functools.lru_cache(maxsize=512)
+def cached_bandpass_sos(x, f_s, b, G, N_order, cache_dir):
+    
+    """
+    In-memory LRU cache of bandpass_sos(), which returns read-only arrays shared by every call with the same parameters. Use cached_bandpass_sos.cache_clear() to empty it and cached_bandpass_sos.cache_info() to inspect it.
+    """
+    
+    file_path = None
+    
+    if cache_dir is not None:
+        file_name = f'sos_x{int(x)}_fs{float(f_s):.12g}_b{int(b)}_G{float(G):.12g}_N{int(N_order)}.npy'
+        file_path = os.path.join(cache_dir, file_name)
+    
+    if file_path is not None and os.path.isfile(file_path):
+        sos = np.load(file_path)
+    else:
+        from scipy import signal
+        
+        f_nyq = f_s / 2
+        f_1 = f_c(1, f_m(x, b, G), b, G)
+        f_2 = f_c(2, f_m(x, b, G), b, G)
+        f_1_norm = f_1 / f_nyq
+        f_2_norm = f_2 / f_nyq
+        
+        sos = signal.butter(N_order, [f_1_norm, f_2_norm], btype='band', output='sos')
+        
+        if file_path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            temporary_path = f'{file_path}.{os.getpid()}.tmp'
+            
+            with open(temporary_path, 'wb') as file:
+                np.save(file, sos)
+            
+            os.replace(temporary_path, file_path) # Escritura atómica, por si varios procesos comparten el cache
+    
+    sos.setflags(write=False)
+    
+    return sos
+
+
 def mean(v, k=2):
     
     """
@@ -159,11 +230,7 @@ def mean(v, k=2):
     """
     
     N = len(v)
-    v_sum = 0
-    
-    for v_i in v:
-        v_sum = v_sum + v_i**k
-    
+    v_sum = np.sum(np.asarray(v)**k)
     v_mean = (v_sum/N)**(1/k)
     
     return v_mean
@@ -214,30 +281,29 @@ def SPL_ave(SPL):
     """
     
     N = len(SPL)
-    SPL_sum = 0
-    
-    for SPL_i in SPL:
-        SPL_sum = SPL_sum + 10**(SPL_i/20)
-    
+    SPL_sum = np.sum(10**(np.asarray(SPL)/20))
     SPL_ave = 20*np.log10(SPL_sum/N)
     
     return SPL_ave
 
 
-def filter_bank(audio_input, f_s, p_ref=0.00002, b=1, G=2, N_order=3):
+def filter_bank(audio_input, f_s, p_ref=0.00002, b=1, G=2, N_order=3, cache_dir=None, workers=None, multirate=False):
     
     """
-    Generates a filter bank and applies it to a given input to obtain the frequency spectrum averaged by fractions of octaves.
+    Generates a filter bank and applies it to a given input to obtain the frequency spectrum averaged by fractions of octaves. All the channels of the input are filtered by each band in a single call, and the bands may be spread across threads, since signal.sosfilt() releases the GIL.
     
     Parameters
     ----------
     
     audio_input : ARRAY
-        Data to be filtered.
+        Data to be filtered. An array of shape (channels, samples) is filtered channel by channel.
     
     f_s : INTEGER
         Sampling rate, which determines the Nyquist frequency.
     
+    p_ref : FLOAT, optional
+        Reference value. The default is 20u Pa.
+    
     b : INTEGER, optional
         Positive integer that determines the bandwith. The default is 1.
     
@@ -247,68 +313,629 @@ def filter_bank(audio_input, f_s, p_ref=0.00002, b=1, G=2, N_order=3):
     N_order : INTEGER, optional
         The order of the filter. Parameter of signal.butter(). The default is 3.
     
+    cache_dir : STRING, optional
+        Folder of the on-disk design cache used by bandpass_sos(). The default is None, which only uses the in-memory cache.
+    
+    workers : INTEGER, optional
+        Number of threads that filter bands concurrently. Each one holds a filtered copy of the input. The default is None, which filters the bands one after another.
+    
+    multirate : BOOLEAN, optional
+        If True, the input runs through a cascade of anti-aliased decimations by 2 and each band is designed and filtered at the lowest rate given by multirate_factors(), so low bands cost a fraction of the high ones and their filters are better conditioned. The default is False.
+    
     Returns
     -------
     
     sos_bank : LIST OF ARRAYS
-        List of arrays of second-order filter coefficients for each band.
+        List of arrays of second-order filter coefficients for each band. In multirate mode each one is designed at f_s divided by its band's decimation factor.
     
     bands : ARRAY OF FLOATS
         Array of bands' central frequencies.
     
     SPL_averages : ARRAY OF FLOATS
-        List of bands' sound pressure level average.
+        Bands' sound pressure level average. For multi-channel input its shape is (channels, bands).
     
     """
     
-    x_vec = range(-5*b-int(b/3), 5*b-int(b/3), 1) # Frequencies index array
-    sos_bank = []
-    SPL_averages = np.array([])
+    from scipy import signal
+    
+    x_vec = band_indexes(b) # Frequencies index array
     bands = f_m(np.array(x_vec), b)
+    audio_input = np.asarray(audio_input)
+    decimated_inputs = {1: audio_input} # Entrada diezmada, por factor de diezmado
+    
+    if multirate:
+        factors = multirate_factors(f_s, audio_input.shape[-1], b, G)
+    else:
+        factors = np.ones(len(x_vec), dtype=int)
+    
+    while max(decimated_inputs) < max(factors):
+        D = max(decimated_inputs)
+        decimated_inputs[2*D] = signal.decimate(decimated_inputs[D], 2, ftype='fir', axis=-1) # FIR, su rizado no se acumula en la cascada como el del IIR
+    
+    sos_bank = [bandpass_sos(x, f_s/D if 1 < D else f_s, b, G, N_order, cache_dir) for x, D in zip(x_vec, factors)]
+    SPL_averages = np.empty(audio_input.shape[:-1] + (len(sos_bank),))
+    
+    def band_level(i):
+        filtered_signal_x = signal.sosfilt(sos_bank[i], decimated_inputs[factors[i]], axis=-1)
+        np.abs(filtered_signal_x, out=filtered_signal_x)
+        SPL_averages[..., i] = 20*np.log10(np.mean(filtered_signal_x, axis=-1)/p_ref) # Equivale a SPL_ave(SPL(filtered_signal_x, p_ref))
+    
+    if workers is None or workers <= 1:
+        for i in range(0, len(sos_bank), 1):
+            band_level(i)
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(band_level, range(0, len(sos_bank), 1)))
+    
+    return sos_bank, bands, SPL_averages
+
+
+def spectral_filter_bank(audio_input, f_s, p_ref=0.00002, b=1, G=2, method='fft', nperseg=8192):
+    
+    """
+    Fast alternative to filter_bank() for steady-state measurements, which only need the level of each band. The band power is obtained by adding the bins of a single real FFT (or a Welch PSD) between the band's cutoff frequencies, using the bin boundaries given by band_bin_edges(). Levels are energy-based (RMS) values, so they read about 1 to 2 dB above the magnitude averages of filter_bank() for sines and noise.
+    
+    Parameters
+    ----------
+    
+    audio_input : ARRAY
+        Data to be analysed. An array of shape (channels, samples) is analysed channel by channel.
+    
+    f_s : INTEGER
+        Sampling rate, which determines the Nyquist frequency.
+    
+    p_ref : FLOAT, optional
+        Reference value. The default is 20u Pa.
+    
+    b : INTEGER, optional
+        Positive integer that determines the bandwith. The default is 1.
+    
+    G : FLOAT, optional
+        Octave ratio. Usual values are 2 or 10^(3/10). The default is 2.
+    
+    method : STRING, optional
+        Either 'fft', for the periodogram of the whole input, or 'welch', for an averaged periodogram of Hann windowed segments. The default is 'fft'.
+    
+    nperseg : INTEGER, optional
+        Length of the Welch segments. Longer segments resolve lower bands. The default is 8192.
+    
+    Returns
+    -------
+    
+    bands : ARRAY OF FLOATS
+        Array of bands' central frequencies.
+    
+    SPL_averages : ARRAY OF FLOATS
+        Bands' sound pressure level. For multi-channel input its shape is (channels, bands). Bands narrower than the frequency resolution hold no bins and get -inf.
+    """
+    
+    audio_input = np.asarray(audio_input)
+    x_vec = band_indexes(b)
+    bands = f_m(np.array(x_vec), b)
+    
+    if method == 'fft':
+        N = audio_input.shape[-1]
+        X = np.fft.rfft(audio_input, axis=-1)
+        power = np.abs(X)**2/N**2
+        power[..., 1:(N + 1)//2] = 2*power[..., 1:(N + 1)//2] # Espectro de un solo lado, DC y Nyquist no se duplican
+        nfft = N
+    elif method == 'welch':
+        from scipy import signal
+        
+        nperseg = min(nperseg, audio_input.shape[-1])
+        f_k, Pxx = signal.welch(audio_input, f_s, nperseg=nperseg, axis=-1)
+        power = Pxx*f_s/nperseg
+        nfft = nperseg
+    else:
+        raise ValueError("The parameter method must be either 'fft' or 'welch'.")
+    
+    edges = band_bin_edges(nfft, f_s, b, G)
+    cumulative_power = np.concatenate((np.zeros(power.shape[:-1] + (1,)), np.cumsum(power, axis=-1)), axis=-1)
+    band_power = cumulative_power[..., edges[1:]] - cumulative_power[..., edges[:-1]] # Cada banda es un rango contiguo de bins
+    
+    with np.errstate(divide='ignore'):
+        SPL_averages = 10*np.log10(np.maximum(band_power, 0)/p_ref**2)
+    
+    return bands, SPL_averages
+
+
+@functools.lru_cache(maxsize=64)
+def band_bin_edges(nfft, f_s, b=1, G=2):
+    
+    """
+    Precomputes which bins of a real FFT of nfft points belong to each band of filter_bank(). Since bins are sorted by frequency, band i holds the contiguous bins from edges[i] to edges[i+1], excluded. Results are cached.
+    
+    Parameters
+    ----------
+    
+    nfft : INTEGER
+        Length of the FFT.
+    
+    f_s : INTEGER
+        Sampling rate, which determines the Nyquist frequency.
+    
+    b : INTEGER, optional
+        Positive integer that determines the bandwith. The default is 1.
+    
+    G : FLOAT, optional
+        Octave ratio. Usual values are 2 or 10^(3/10). The default is 2.
+    
+    Returns
+    -------
+    
+    edges : ARRAY OF INTEGERS
+        Read-only array of len(bands) + 1 bin indexes.
+    """
+    
+    x_vec = np.array(band_indexes(b))
+    f_1 = f_c(1, f_m(x_vec, b, G), b, G)
+    f_2 = f_c(2, f_m(x_vec, b, G), b, G)
+    f_k = np.fft.rfftfreq(nfft, 1/f_s)
+    
+    edges = np.searchsorted(f_k, np.append(f_1, f_2[-1]))
+    edges.setflags(write=False)
+    
+    return edges
+
+
+def multirate_factors(f_s, N, b=1, G=2, min_samples=256):
+    
+    """
+    Calculates the decimation factor of each band of filter_bank() in multirate mode. Each factor is the greatest power of 2 that keeps the band's highcut frequency below half of the decimated Nyquist frequency, far from the anti-aliasing filter of signal.decimate(), and leaves at least min_samples samples.
+    
+    Parameters
+    ----------
+    
+    f_s : INTEGER
+        Sampling rate, which determines the Nyquist frequency.
+    
+    N : INTEGER
+        Number of samples of the input.
+    
+    b : INTEGER, optional
+        Positive integer that determines the bandwith. The default is 1.
+    
+    G : FLOAT, optional
+        Octave ratio. Usual values are 2 or 10^(3/10). The default is 2.
+    
+    min_samples : INTEGER, optional
+        Minimum number of samples of a decimated input. The default is 256.
+    
+    Returns
+    -------
+    
+    factors : ARRAY OF INTEGERS
+        Decimation factor of each band.
+    """
+    
+    x_vec = np.array(band_indexes(b))
+    f_2 = f_c(2, f_m(x_vec, b, G), b, G)
+    factors = np.ones(len(x_vec), dtype=int)
+    
+    for i in range(0, len(x_vec), 1):
+        while 4*f_2[i] <= f_s/(2*factors[i]) and min_samples <= N/(2*factors[i]):
+            factors[i] = 2*factors[i]
+    
+    return factors
+
+
+def band_filters(f_s, b=1, G=2, N_order=3, cache_dir=None):
+    
+    """
+    Creates a stateful filter with the bandpass filters of every band of filter_bank(), which keeps their states between calls to its process() method. It filters long inputs in small blocks, with low latency and the same output as filtering them at once.
+    
+    Parameters
+    ----------
+    
+    f_s : INTEGER
+        Sampling rate, which determines the Nyquist frequency.
+    
+    b : INTEGER, optional
+        Positive integer that determines the bandwith. The default is 1.
+    
+    G : FLOAT, optional
+        Octave ratio. Usual values are 2 or 10^(3/10). The default is 2.
+    
+    N_order : INTEGER, optional
+        The order of the filter. Parameter of signal.butter(). The default is 3.
+    
+    cache_dir : STRING, optional
+        Folder of the on-disk design cache used by bandpass_sos(). The default is None, which only uses the in-memory cache.
+    
+    Returns
+    -------
+    
+    bank_filter : SOSFILTER
+        Filter whose process(block) returns an array of shape (bands,) + block.shape.
+    """
+    
+    sos_bank = [bandpass_sos(x, f_s, b, G, N_order, cache_dir) for x in band_indexes(b)]
+    bank_filter = SOSFilter(sos_bank)
+    
+    return bank_filter
+
+
+def band_indexes(b=1):
+    
+    """
+    Returns the indexes of the bands analysed by filter_bank() for a given bandwith.
+
+    Parameters
+    ----------
+    
+    b : INTEGER, optional
+        Positive integer that determines the bandwith. The default is 1.
+
+    Returns
+    -------
+    
+    x_vec : RANGE
+        Indexes of the bands, to be used with f_m() and bandpass_filter().
+    """
+    
+    x_vec = range(-5*b-int(b/3), 5*b-int(b/3), 1)
+    
+    return x_vec
+
 
-    for x in x_vec:
-        sos_x = bandpass_filter(x, f_s, b, G, N_order)[0]
-        sos_bank.append(sos_x)
+def filter_bank_blocks(blocks, f_s, p_ref=0.00002, b=1, G=2, N_order=3, cache_dir=None):
+    
+    """
+    Same as filter_bank() but consuming the input block by block, so arbitrarily long recordings are analysed with bounded memory. The state of each band filter is carried between blocks, so the result matches filter_bank() applied to the whole input.
+    
+    Parameters
+    ----------
+    
+    blocks : ITERABLE OF ARRAYS
+        Consecutive, non overlapping blocks of data to be filtered, such as a Stream or Signal.iter_blocks(). Blocks of shape (channels, samples) are filtered channel by channel.
+    
+    f_s : INTEGER
+        Sampling rate, which determines the Nyquist frequency.
+    
+    p_ref : FLOAT, optional
+        Reference value. The default is 20u Pa.
+    
+    b : INTEGER, optional
+        Positive integer that determines the bandwith. The default is 1.
+    
+    G : FLOAT, optional
+        Octave ratio. Usual values are 2 or 10^(3/10). The default is 2.
+    
+    N_order : INTEGER, optional
+        The order of the filter. Parameter of signal.butter(). The default is 3.
+    
+    cache_dir : STRING, optional
+        Folder of the on-disk design cache used by bandpass_sos(). The default is None, which only uses the in-memory cache.
+    
+    Returns
+    -------
+    
+    sos_bank : LIST OF ARRAYS
+        List of arrays of second-order filter coefficients for each band.
+    
+    bands : ARRAY OF FLOATS
+        Array of bands' central frequencies.
+    
+    SPL_averages : ARRAY OF FLOATS
+        Bands' sound pressure level average. For multi-channel blocks its shape is (channels, bands).
     
-    for sos_x in sos_bank:
-        filtered_signal_x = signal.sosfilt(sos_x, audio_input)
-        SPL_x = SPL(filtered_signal_x, p_ref)
-        SPL_averages = np.concatenate(( SPL_averages, np.array([SPL_ave(SPL_x)]) ))
+    """
+    
+    check_blocks(blocks)
+    bank_filter = band_filters(f_s, b, G, N_order, cache_dir)
+    bands = f_m(np.array(band_indexes(b)), b)
+    v_sums = 0
+    N = 0
+    
+    for block in blocks:
+        filtered_block = np.abs(bank_filter.process(block))
+        v_sums = v_sums + np.moveaxis(np.sum(filtered_block, axis=-1), 0, -1) # Forma (..., bands)
+        N = N + np.shape(block)[-1]
+    
+    sos_bank = bank_filter.sos_bank
+    SPL_averages = 20*np.log10(v_sums/(N*p_ref))
     
     return sos_bank, bands, SPL_averages
 
 
-def fft(x, f_s):
+def mean_blocks(blocks, k=2):
+    
+    """
+    Calculates the generalized mean of a vector given block by block, with bounded memory.
+
+    Parameters
+    ----------
+    
+    blocks : ITERABLE OF ARRAYS
+        Consecutive, non overlapping blocks of the vector, such as a Stream or Signal.iter_blocks().
+    
+    k : INTEGER, optional
+        Positive integer that defines the root, being k=2 the RMS value. The default is 2.
+
+    Returns
+    -------
     
+    v_mean : FLOAT
+        Mean value.
     """
-    Fast Fourier transform of a given time signal.
+    
+    check_blocks(blocks)
+    N = 0
+    v_sum = 0
+    
+    for block in blocks:
+        v_sum = v_sum + np.sum(block**k)
+        N = N + np.size(block)
+    
+    v_mean = (v_sum/N)**(1/k)
+    
+    return v_mean
+
+
+def SPL_ave_blocks(blocks, p_ref=0.00002):
+    
+    """
+    Calculates the sound pressure level average of a pressure vector given block by block, with bounded memory. It is equivalent to SPL_ave(SPL(v, p_ref)).
+    
+    Parameters
+    ----------
+    
+    blocks : ITERABLE OF ARRAYS
+        Consecutive, non overlapping blocks of pressure [Pa], such as a Stream or Signal.iter_blocks().
+    
+    p_ref : FLOAT, optional
+        Reference value. The default is 20u Pa.
+    
+    Returns
+    -------
+    
+    SPL_ave : FLOAT
+        Average sound pressure level.
+    """
+    
+    check_blocks(blocks)
+    N = 0
+    v_sum = 0
+    
+    for block in blocks:
+        v_sum = v_sum + np.sum(np.abs(block))
+        N = N + np.size(block)
+    
+    SPL_ave = 20*np.log10(v_sum/(N*p_ref))
+    
+    return SPL_ave
+
+
+def fft_blocks(blocks, f_s):
+    
+    """
+    Fast Fourier transform of a time signal given block by block. Each block is transformed as it arrives, so only one block is kept in memory.
+
+    Parameters
+    ----------
+    
+    blocks : ITERABLE OF ARRAYS
+        Blocks of the function of time, such as a Stream or Signal.iter_blocks(). They may overlap.
+    
+    f_s : INTEGER
+        Sampling rate, which determines the Nyquist frequency.
+
+    Yields
+    ------
+    
+    spectrum : TUPLE OF NUMPY ARRAYS
+        The X_frequencies, X_magnitude and X_phase arrays returned by fft() for each block.
+    """
+    
+    for block in blocks:
+        yield fft(block, f_s)
+
+
+def check_blocks(blocks):
+    
+    """
+    Raises a ValueError if the given blocks come from a Stream whose blocks overlap, since accumulators would count some samples twice.
+
+    Parameters
+    ----------
+    
+    blocks : ITERABLE OF ARRAYS
+        Blocks to be checked.
+
+    Returns
+    -------
+    
+    None.
+    """
+    
+    if isinstance(blocks, Stream) and blocks.is_overlapped():
+        raise ValueError('Overlapping blocks can not be accumulated. Use a Stream whose hop_size is equal to its block_size.')
+    
+    return
+
+
+def welch(source, f_s, nperseg=4096, hop_size=None, window='hann', scaling='spectrum', p_ref=1, workers=None):
+    
+    """
+    Welch averaged power spectrum of a time signal. Segments are taken from the source by a Stream and their power spectra are accumulated one at a time, so memory is O(nperseg) no matter the length of the input, and averaging many segments reduces the variance of the estimate.
+
+    Parameters
+    ----------
+    
+    source : ARRAY, STRING OR ITERABLE OF ARRAYS
+        Function of time, given as anything accepted by Stream: an array, the path to a .npy file or blocks such as Signal.iter_blocks() or Oscillator.blocks().
+    
+    f_s : INTEGER
+        Sampling rate, which determines the Nyquist frequency.
+    
+    nperseg : INTEGER, optional
+        Length of each segment, which is also the length of the transforms. The default is 4096.
+    
+    hop_size : INTEGER, optional
+        Samples between the starts of consecutive segments. The default is nperseg/2, a 50% overlap.
+    
+    window : STRING OR TUPLE, optional
+        Window applied to each segment, as accepted by signal.get_window(). The default is 'hann'.
+    
+    scaling : STRING, optional
+        Either 'spectrum', so that a sinewave of amplitude A reads 20*log10(A/p_ref) dB, or 'density', for the power spectral density in dB re p_ref^2/Hz. The default is 'spectrum'.
+    
+    p_ref : FLOAT, optional
+        Reference value of the levels. Use 0.00002 for sound pressure in Pa. The default is 1.
+    
+    workers : INTEGER, optional
+        Number of workers used by scipy.fft. The default is None.
+
+    Returns
+    -------
+    
+    signal : SIGNAL
+        Signal whose frequency_array and X_magnitude_array (in dB) hold the averaged spectrum, ready for Grapher.plot_spectrum(). Its X_phase_array is zero.
+    """
+    
+    import scipy.fft
+    
+    if scaling not in ('spectrum', 'density'):
+        raise ValueError("The parameter scaling must be either 'spectrum' or 'density'.")
+    
+    if hop_size is None:
+        hop_size = nperseg//2
+    
+    w = fft_window(window, nperseg)
+    power_sum = np.zeros(nperseg//2 + 1)
+    number_of_segments = 0
+    
+    for segment in Stream(source, nperseg, hop_size, f_s):
+        if len(segment) < nperseg:
+            continue # El último segmento incompleto se descarta, como en signal.welch()
+        
+        X = scipy.fft.rfft(segment*w, workers=workers)
+        power_sum += X.real**2 + X.imag**2
+        number_of_segments = number_of_segments + 1
+    
+    if number_of_segments == 0:
+        raise ValueError('The source is shorter than nperseg.')
+    
+    power = power_sum/number_of_segments
+    
+    with np.errstate(divide='ignore'):
+        if scaling == 'spectrum':
+            X_magnitude = 10*np.log10(power*(2/np.sum(w))**2/p_ref**2)
+        else:
+            power[1:(nperseg + 1)//2] = 2*power[1:(nperseg + 1)//2] # Densidad de un solo lado
+            X_magnitude = 10*np.log10(power/(f_s*np.sum(w**2))/p_ref**2)
+    
+    signal = Signal()
+    signal.sampling_rate = f_s
+    signal.frequency_array = np.fft.rfftfreq(nperseg, 1/f_s)
+    signal.X_magnitude_array = X_magnitude
+    signal.X_phase_array = np.zeros(len(X_magnitude))
+    signal.description = 'Welch'
+    
+    return signal
+
+
+def fft(x, f_s, n=None, window=None, fast_len=False, workers=None, out=None):
+    
+    """
+    Fast Fourier transform of a given real time signal. It uses a real-input FFT, so only the non-negative frequencies are computed, and transforms every row of a 2D input at once.
 
     Parameters
     ----------
     
     x : NUMPY ARRAY
-        Function of time.
+        Function of time. An array of shape (frames, samples) or (channels, samples) is transformed row by row.
     
     f_s : INTEGER
-        Sampling rate, which determines the Nyquist frequency..
+        Sampling rate, which determines the Nyquist frequency.
+    
+    n : INTEGER, optional
+        Length of the transform. The input is cropped or padded with zeros. The default is the number of samples.
+    
+    window : STRING, TUPLE OR NUMPY ARRAY, optional
+        Window applied before the transform, as accepted by signal.get_window(), or the window samples themselves. Windows are cached by fft_window(). The default is None, which does not apply any.
+    
+    fast_len : BOOLEAN, optional
+        If True, the input is padded with zeros up to the next length that scipy.fft transforms efficiently. The default is False.
+    
+    workers : INTEGER, optional
+        Number of workers used by scipy.fft to transform many rows in parallel. The default is None.
+    
+    out : TUPLE OF NUMPY ARRAYS, optional
+        Preallocated X_frequencies, X_magnitude and X_phase arrays to write the results into. The default is None.
 
     Returns
     -------
     
     X_frequencies : NUMPY ARRAY
-        Array of frequencies which the function of time is composed of.
+        Array of frequencies which the function of time is composed of, from 0 up to the Nyquist frequency.
     
     X_magnitude : NUMPY ARRAY
-        Magnitudes of the frequencies.
+        Magnitudes of the frequencies, scaled so that a sinewave of amplitude A reads A.
     
     X_phase : NUMPY ARRAY
         Phase of the frequencies.
     """
     
-    fft_raw = np.fft.fft(x)
-    fft = fft_raw[:len(fft_raw)//2]
-    X_magnitude = abs(fft)/len(fft)
-    X_phase = np.arctan2(np.imag(fft),np.real(fft))
-    X_frequencies = np.linspace(0,f_s/2, len(fft))
+    import scipy.fft
+    
+    x = np.asarray(x)
+    N = x.shape[-1]
+    
+    if n is None:
+        n = N
+    
+    if fast_len:
+        n = scipy.fft.next_fast_len(n, real=True)
+    
+    if window is None:
+        scale = min(N, n)/2
+    else:
+        w = fft_window(window, N) if not isinstance(window, np.ndarray) else window
+        x = x*w
+        scale = np.sum(w[:n])/2
+    
+    X = scipy.fft.rfft(x, n, axis=-1, workers=workers)
+    
+    if out is None:
+        out = (np.empty(X.shape[-1]), np.empty(X.shape), np.empty(X.shape))
+    
+    X_frequencies, X_magnitude, X_phase = out
+    X_frequencies[...] = np.fft.rfftfreq(n, 1/f_s)
+    np.abs(X, out=X_magnitude)
+    X_magnitude /= scale
+    np.arctan2(X.imag, X.real, out=X_phase)
+    
+    return X_frequencies, X_magnitude, X_phase
+
+
+@functools.lru_cache(maxsize=32)
+def fft_window(window, N):
+    
+    """
+    Returns a cached, read-only window of a given length, so repeated transforms of the same size do not rebuild it.
+
+    Parameters
+    ----------
+    
+    window : STRING OR TUPLE
+        Window name and parameters, as accepted by signal.get_window().
+    
+    N : INTEGER
+        Length of the window.
+
+    Returns
+    -------
+    
+    w : NUMPY ARRAY
+        Periodic window, suited to spectral analysis.
+    """
+    
+    from scipy import signal
+    
+    w = signal.get_window(window, N, fftbins=True)
+    w.setflags(write=False)
     
-    return X_frequencies, X_magnitude, X_phase
\ No newline at end of file
+    return w
\ No newline at end of file
@@ -1,5 +1,6 @@
 import numpy as np
 import math
+from fractions import Fraction
 
 
 def info(variable_input):
@@ -51,16 +52,16 @@ def info(variable_input):
 
 def pretty_frequency(frequency):
     if frequency < 1000:
-        pretty_number = round_float(frequency, 2)
+        pretty_number = float(round_significant(frequency, 2))
         pretty_frequency = str(pretty_number) + "Hz"
 
     elif frequency < 10000:
-        pretty_number = round_float(frequency / 1000, 2)
+        pretty_number = float(round_significant(frequency / 1000, 2))
         pretty_number = "{:.1f}".format(pretty_number)
         pretty_frequency = str(pretty_number) + "kHz"
 
     else:
-        pretty_number = round_float(frequency / 1000, 3)
+        pretty_number = float(round_significant(frequency / 1000, 3))
         pretty_frequency = str(pretty_number) + "kHz"
 
     pretty_frequency = pretty_frequency.replace(".0", "")
@@ -91,36 +92,42 @@ def to_list(variable_input):
     return list_output
 
 
-def round_float(number_input, significant_digits = 3):
+def round_significant(array_input, significant_digits = 3):
     """
-    Attempts to round a given float to a certain number of significant figures. Contemplates that the decimal (. ,) and negative (-) symbols are not digits.
+    Rounds the elements of a given number or array of any shape to a certain number of significant figures. The order of magnitude of each element is obtained with log10, so the whole array is rounded at once by NumPy. Zeros, infinities and NaN are left as they are.
 
     Args:
-        number_input (float) Input that is going to be rounded.
+        array_input (float or numpy.ndarray of floats) Input that is going to be rounded.
         significant_digits (int, optional) Significant figures or digits. The default is 3.
 
     Returns:
-        (float) Rounded number.
+        (numpy.float64 or numpy.ndarray of floats) Rounded input, with the same shape.
     """
 
-    if '-' not in str(number_input):
-        int_digits = len(str(int(number_input)))
-    else:
-        int_digits = len(str(int(number_input))) - 1
+    values = np.asarray(array_input, dtype = float)
+    is_roundable = np.isfinite(values) & (values != 0)
+    magnitudes = np.zeros(values.shape)
+    np.floor(np.log10(np.abs(values), out = magnitudes, where = is_roundable), out = magnitudes, where = is_roundable)
+
+    factors = 10.0 ** (significant_digits - 1 - magnitudes)
+    rounded = np.where(is_roundable, np.round(values * factors) / factors, values)
+
+    return rounded[()]
 
-    amount_of_characters = len(str(number_input))
-    dec_digits = amount_of_characters - int_digits - 1
-    number_input = number_input / 10 ** int_digits
-    number_input = round(number_input, significant_digits)
-    number_input = number_input * (10 ** int_digits)
 
-    if str(number_input)[-2:] == '.0':
-        rounded_float = int(number_input)
+def round_float(number_input, significant_digits = 3):
+    """
+    Rounds a given float to a certain number of significant figures. Contemplates that the decimal (. ,) and negative (-) symbols are not digits.
+
+    Args:
+        number_input (float) Input that is going to be rounded.
+        significant_digits (int, optional) Significant figures or digits. The default is 3.
 
-    if str(number_input)[1 - dec_digits:] == '9' * (dec_digits - 1):
-        rounded_float = round(number_input, 1)
+    Returns:
+        (float) Rounded number.
+    """
 
-    rounded_float = number_input
+    rounded_float = float(round_significant(number_input, significant_digits))
 
     return rounded_float
 
@@ -137,15 +144,117 @@ def round_array(array_input, significant_digits = 3):
         (numpy.ndarray of floats) Array with rounded elements.
     """
 
-    rounded_array = np.array([])
-
-    for each_element in array_input:
-        rounded_element = round_float(each_element)
-        rounded_array = np.append(rounded_array, rounded_element)
+    rounded_array = np.asarray(round_significant(array_input, significant_digits))
 
     return rounded_array
 
 
+def periodic_extend(array_input, number_of_samples, period_length = None, out = None):
+    """
+    Repeats the first period of a given array until it fills a buffer of a certain length. The buffer is written once: after copying the period, the already filled part is copied over the empty part doubling its size each time, so the cost is about the one of a single memory copy.
+
+    Args:
+        array_input (numpy.ndarray) Input whose first period_length samples are going to be repeated.
+        number_of_samples (int) Length of the output buffer.
+        period_length (int, optional) Amount of samples of a period. The default is the length of array_input.
+        out (numpy.ndarray, optional) Preallocated buffer of at least number_of_samples elements to write into. It may be array_input itself, in which case the first period is not copied. The default allocates a new buffer.
+
+    Returns:
+        (numpy.ndarray) Buffer of number_of_samples elements which contains the repeated period.
+    """
+
+    if period_length is None:
+        period_length = len(array_input)
+
+    if period_length <= 0 or len(array_input) < period_length:
+        raise ValueError('The parameter period_length must be positive and not greater than the length of array_input.')
+
+    if out is None:
+        out = np.empty(number_of_samples, dtype = array_input.dtype)
+    elif len(out) < number_of_samples:
+        raise ValueError('The buffer out is smaller than number_of_samples.')
+
+    out = out[:number_of_samples]
+    filled = min(period_length, number_of_samples)
+
+    if not np.shares_memory(out, array_input):
+        out[:filled] = array_input[:filled]
+
+    while filled < number_of_samples:
+        chunk = min(filled, number_of_samples - filled)
+        out[filled:filled + chunk] = out[:chunk]
+        filled = filled + chunk
+
+    return out
+
+
+def merge_spectra(frequency_arrays, magnitude_arrays, phase_arrays):
+    """
+    Merges many line spectra into a single one sorted by increasing frequency. Partials that share the same frequency are added as phasors, so the result has one line per frequency. It relies on a vectorized sort, which makes it O(n log n) on the total amount of partials.
+
+    Args:
+        frequency_arrays (list of numpy.ndarray) Frequencies of each spectrum.
+        magnitude_arrays (list of numpy.ndarray) Magnitudes of each spectrum.
+        phase_arrays (list of numpy.ndarray) Phases in degrees of each spectrum.
+
+    Returns:
+        (tuple of numpy.ndarray) The merged frequency, magnitude and phase (in degrees) arrays.
+    """
+
+    frequencies = np.concatenate(frequency_arrays)
+    magnitudes = np.concatenate(magnitude_arrays)
+    phases_rad = np.radians(np.concatenate(phase_arrays))
+
+    merged_frequencies, indexes = np.unique(frequencies, return_inverse = True)
+    real_part = np.bincount(indexes, weights = magnitudes * np.cos(phases_rad), minlength = len(merged_frequencies))
+    imag_part = np.bincount(indexes, weights = magnitudes * np.sin(phases_rad), minlength = len(merged_frequencies))
+
+    merged_magnitudes = np.hypot(real_part, imag_part)
+    merged_phases = np.degrees(np.arctan2(imag_part, real_part))
+
+    return merged_frequencies, merged_magnitudes, merged_phases
+
+
+def minmax_envelope(array_input, number_of_bins, start = 0, stop = None):
+    """
+    Decimates a trace for display. The samples between start and stop are split into number_of_bins consecutive groups and only the minimum and the maximum of each group are kept, in their original order, so a line drawn through them covers the same pixels as the whole trace when each group fits in a pixel column.
+
+    Args:
+        array_input (numpy.ndarray) 1D trace.
+        number_of_bins (int) Amount of groups, usually the width in pixels of the plot.
+        start (int, optional) First sample of the range. The default is 0.
+        stop (int, optional) End of the range, not included. The default is the length of array_input.
+
+    Returns:
+        (numpy.ndarray) Increasing indexes of the kept samples. If the range has no more than 2 * number_of_bins samples, it has every one of them.
+    """
+
+    if stop is None:
+        stop = len(array_input)
+
+    number_of_samples = stop - start
+
+    if number_of_samples <= 2 * number_of_bins:
+        return np.arange(start, stop)
+
+    bin_length = int(np.ceil(number_of_samples / number_of_bins))
+    full_bins = number_of_samples // bin_length
+    groups = array_input[start:start + full_bins * bin_length].reshape(full_bins, bin_length) # Vista, sin copiar muestras
+    offsets = start + bin_length * np.arange(full_bins)
+
+    min_indexes = [offsets + np.argmin(groups, axis = 1)]
+    max_indexes = [offsets + np.argmax(groups, axis = 1)]
+
+    if full_bins * bin_length < number_of_samples:
+        last_group = array_input[start + full_bins * bin_length:stop]
+        min_indexes.append([start + full_bins * bin_length + np.argmin(last_group)])
+        max_indexes.append([start + full_bins * bin_length + np.argmax(last_group)])
+
+    pairs = np.stack((np.concatenate(min_indexes), np.concatenate(max_indexes)), axis = 1)
+
+    return np.sort(pairs, axis = 1).ravel()
+
+
 def closest_to_average(numbers_list):
     """
     Returns the value from a given list which is closest to the average of all the values from it.
@@ -173,7 +282,7 @@ def closest_to_average(numbers_list):
     return closest
 
 
-def get_lower_frequency(self, *signals):
+def get_lower_frequency(*signals):
     fundamental_frequency = signals[0].fundamental_frequency
 
     for i in range(1, len(signals), 1):
@@ -192,23 +301,70 @@ def extend_to_min(*signals):
     return
 
 
-def get_sum_period(*signals):
-    frequencies_list = []
+def get_sum_frequency(*signals, max_denominator = 1000):
+    """
+    Calculates the greatest common divisor of the fundamental frequencies of the given signals, which is the fundamental frequency of their sum. Each frequency is approximated by the closest fraction whose denominator does not exceed max_denominator, so float frequencies are supported.
 
-    for i in range(0, len(signals), 1):
-        frequencies_list.append(signals[i].fundamental_frequency)
+    Args:
+        signals (Signal) Signals whose fundamental frequencies are going to be evaluated.
+        max_denominator (int, optional) Greatest denominator of the rational approximations. Frequencies are matched up to about 1 / max_denominator Hz. The default is 1000.
+
+    Returns:
+        (fractions.Fraction) Fundamental frequency of the sum.
+    """
+
+    frequencies = [Fraction(each_signal.fundamental_frequency).limit_denominator(max_denominator) for each_signal in signals]
 
-    gcd_result = math.gcd(*tuple(frequencies_list))
-    T_0 = 1 / gcd_result
+    numerators_gcd = math.gcd(*[frequency.numerator for frequency in frequencies])
+    denominators_lcm = math.lcm(*[frequency.denominator for frequency in frequencies])
+
+    return Fraction(numerators_gcd, denominators_lcm)
+
+
+def get_sum_period(*signals, max_denominator = 1000):
+    """
+    Calculates the shortest period of the sum of the given signals.
+
+    Args:
+        signals (Signal) Signals whose fundamental frequencies are going to be evaluated.
+        max_denominator (int, optional) Greatest denominator of the rational approximations of the frequencies. The default is 1000.
+
+    Returns:
+        (float) Period in seconds.
+    """
+
+    T_0 = float(1 / get_sum_frequency(*signals, max_denominator = max_denominator))
 
     return T_0
 
 
-def extend_to_sum(*signals):
-    sum_period = get_sum_period(*signals) * 4 # Probando signal.extend(), sacar * 4 al terminar
+def get_sum_samples(sampling_rate, *signals, max_denominator = 1000):
+    """
+    Calculates the shortest amount of samples that holds an exact integer amount of periods of the sum of the given signals.
+
+    Args:
+        sampling_rate (float) Sampling rate in Hz.
+        signals (Signal) Signals whose fundamental frequencies are going to be evaluated.
+        max_denominator (int, optional) Greatest denominator of the rational approximations of the frequencies. The default is 1000.
+
+    Returns:
+        (int) Amount of samples.
+    """
+
+    samples_per_period = Fraction(sampling_rate).limit_denominator(max_denominator) / get_sum_frequency(*signals, max_denominator = max_denominator)
+
+    return samples_per_period.numerator # Menor múltiplo entero de numerator / denominator
+
+
+def extend_to_sum(*signals, sampling_rate = None):
+    sum_period = get_sum_period(*signals)
+    number_of_samples = None
+
+    if sampling_rate is not None:
+        number_of_samples = get_sum_samples(sampling_rate, *signals)
 
     for i in range(0, len(signals), 1):
-        signals[i].extend(sum_period)
+        signals[i].extend(sum_period, number_of_samples = number_of_samples)
 
     return
 
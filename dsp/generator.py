@@ -1,12 +1,13 @@
 import numpy as np
 from dsp.signal import Signal
+from dsp.oscillator import Oscillator
 from dsp.ticks import Ticks
 
 from dsp.functions import (
     pretty_frequency,
-    buble_increasing_sort,
+    merge_spectra,
     get_sum_period,
-    extend_to_sum
+    get_sum_samples
 )
 
 
@@ -47,39 +48,30 @@ class Generator:
     def sum_signals(self, *signals):
 
         sum_signal = Signal()
-        extend_to_sum(*signals)
         sum_signal.copy_from(signals[0]) # Asigna los atributos de signals[0] a sum_signal, pero alojándolo en una dirección de memoria RAM distinta a la de signals[0]. De haber igualado ambos objetos, se habrían asignado los punteros en una única dirección RAM.
 
-        for i in range(1, len(signals), 1):
-            sum_signal.amplitude_array += signals[i].amplitude_array
+        number_of_samples = get_sum_samples(self.sampling_rate, *signals) + 1 # Períodos enteros de la suma, más la muestra que cierra el último como en sinewave()
+        time_array = np.arange(number_of_samples) / self.sampling_rate
+        sum_signal.time_array = time_array
 
-            sum_signal.frequency_array = np.append(
-                sum_signal.frequency_array,
-                signals[i].frequency_array
-            )
+        amplitude_array = np.zeros(number_of_samples)
 
-            sum_signal.X_magnitude_array = np.append(
-                sum_signal.X_magnitude_array,
-                signals[i].X_magnitude_array
-            )
+        for i in range(0, len(signals), 1):
+            amplitude_array += signals[i].values_at(time_array) # Cada operando tiene su propio paso temporal, se evalúa en el eje de la suma
 
-            sum_signal.X_phase_array = np.append(
-                sum_signal.X_phase_array,
-                signals[i].X_phase_array
-            )
+        sum_signal.amplitude_array = amplitude_array
 
-        master = sum_signal.frequency_array
-        slave_1 = sum_signal.X_magnitude_array
-        slave_2 = sum_signal.X_phase_array
-        sorted_arrays = buble_increasing_sort(master, slave_1, slave_2)
+        merged_spectrum = merge_spectra(
+            [each_signal.frequency_array for each_signal in signals],
+            [each_signal.X_magnitude_array for each_signal in signals],
+            [each_signal.X_phase_array for each_signal in signals]
+        )
 
-        sum_signal.frequency_array = sorted_arrays[0]
-        sum_signal.X_magnitude_array = sorted_arrays[1]
-        sum_signal.X_phase_array = sorted_arrays[2]
+        sum_signal.frequency_array = merged_spectrum[0]
+        sum_signal.X_magnitude_array = merged_spectrum[1]
+        sum_signal.X_phase_array = merged_spectrum[2]
 
         T_0 = get_sum_period(*signals)
-        print(f'Período: {T_0}') # Probando signal.extend(), eliminar linea al terminar
-        T_0 = 4 * T_0 # Probando signal.extend(), eliminar linea al terminar
         sum_signal.fundamental_frequency = 1 / T_0
         sum_signal.description = "sum"
 
@@ -106,10 +98,12 @@ class Generator:
         signal.fundamental_amplitude = fundamental_amplitude
         signal.fundamental_phase = fundamental_phase
 
-        signal.time_array = self.linspace_time_array(
-            signal.fundamental_frequency,
-            number_of_periods
-        )
+        signal.number_of_samples = number_of_periods * int(self.sampling_rate / fundamental_frequency)
+
+        if signal.number_of_samples < 2:
+            signal.time_step = 1 / self.sampling_rate # Con una sola muestra, o ninguna, el período no define el paso
+        else:
+            signal.time_step = number_of_periods / (fundamental_frequency * (signal.number_of_samples - 1)) # Mismo eje que linspace_time_array(), pero implícito
 
         signal.amplitude_array = self.sinewave_amplitude(
             signal.time_array,
@@ -130,6 +124,111 @@ class Generator:
         return signal
 
 
+    def sinewave_bank(
+            self,
+            frequencies,
+            amplitudes = 1,
+            phases = 0,
+            duration = 1,
+            mix = False,
+            chunk_size = 4096,
+            description = "N/A"
+    ):
+        """
+        Generates many sinewaves at once over a shared time axis, evaluating all of them with a single broadcasted computation per chunk of samples.
+
+        Args:
+            frequencies (array_like) Frequencies in Hz of the sinewaves.
+            amplitudes (float or array_like, optional) Amplitudes of the sinewaves. The default is 1.
+            phases (float or array_like, optional) Phases in degrees of the sinewaves. The default is 0.
+            duration (float, optional) Duration in seconds of the signal. The default is 1.
+            mix (bool, optional) If True, the sinewaves are added into a 1D signal. If False, the amplitude_array has one row per sinewave. The default is False.
+            chunk_size (int, optional) Amount of samples computed at once. The temporary memory is about len(frequencies) * chunk_size floats, no matter the duration. The default is 4096.
+            description (string, optional) Description of the signal. The default is "N/A".
+
+        Returns:
+            (Signal) Multi-channel or mixed signal with the line spectrum of the sinewaves.
+        """
+
+        frequencies = np.atleast_1d(np.asarray(frequencies, dtype = float))
+        amplitudes = np.broadcast_to(np.asarray(amplitudes, dtype = float), frequencies.shape)
+        phases = np.broadcast_to(np.asarray(phases, dtype = float), frequencies.shape)
+
+        number_of_samples = int(round(duration * self.sampling_rate))
+        omegas = (2 * np.pi * frequencies / self.sampling_rate)[:, np.newaxis] # Frecuencia angular por muestra
+        phases_rad = (phases * (np.pi / 180))[:, np.newaxis]
+        weights = amplitudes[:, np.newaxis]
+
+        if mix:
+            amplitude_array = np.empty(number_of_samples)
+        else:
+            amplitude_array = np.empty((len(frequencies), number_of_samples))
+
+        for start in range(0, number_of_samples, chunk_size):
+            stop = min(start + chunk_size, number_of_samples)
+            chunk = weights * np.sin(omegas * np.arange(start, stop) + phases_rad)
+
+            if mix:
+                amplitude_array[start:stop] = np.sum(chunk, axis = 0)
+            else:
+                amplitude_array[:, start:stop] = chunk
+
+        signal = Signal()
+        lowest = np.argmin(frequencies)
+
+        signal.fundamental_frequency = frequencies[lowest]
+        signal.fundamental_amplitude = amplitudes[lowest]
+        signal.fundamental_phase = phases[lowest]
+        signal.time_start = 0
+        signal.sampling_rate = self.sampling_rate
+        signal.amplitude_array = amplitude_array
+
+        if mix:
+            line_spectrum = merge_spectra([frequencies], [amplitudes], [phases])
+        else:
+            line_spectrum = (frequencies, np.array(amplitudes), np.array(phases))
+
+        signal.frequency_array = line_spectrum[0]
+        signal.X_magnitude_array = line_spectrum[1]
+        signal.X_phase_array = line_spectrum[2]
+
+        if description == "N/A":
+            description = f'{len(frequencies)} sines'
+
+        signal.description = description
+
+        return signal
+
+
+    def oscillator(
+            self,
+            fundamental_frequency = 1000,
+            fundamental_amplitude = 1,
+            fundamental_phase = 0,
+            block_size = 4096
+    ):
+        """
+        Creates a streaming sinewave oscillator at the sampling rate of the generator. Unlike sinewave(), it does not materialize the whole signal: it yields blocks of samples carrying the phase between them, so arbitrarily long tones use constant memory.
+
+        Args:
+            fundamental_frequency (float, optional) Frequency in Hz. The default is 1000.
+            fundamental_amplitude (float, optional) Amplitude. The default is 1.
+            fundamental_phase (float, optional) Phase in degrees. The default is 0.
+            block_size (int, optional) Amount of samples of each block. The default is 4096.
+
+        Returns:
+            (Oscillator) Iterable source of blocks.
+        """
+
+        return Oscillator(
+            fundamental_frequency,
+            fundamental_amplitude,
+            fundamental_phase,
+            self.sampling_rate,
+            block_size
+        )
+
+
     def unit_impulse(
         self,
         starting_sample = -10,
@@ -143,7 +242,9 @@ class Generator:
         signal.fundamental_frequency = 1
         signal.fundamental_amplitude = 1
         signal.fundamental_phase = 0
-        signal.time_array = self.samples_array(starting_sample, ending_sample)
+        signal.time_start = starting_sample
+        signal.time_step = 1
+        signal.number_of_samples = ending_sample - starting_sample
 
         signal.amplitude_array = self.unit_impulse_amplitude(
             signal.time_array,
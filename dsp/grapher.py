@@ -1,13 +1,17 @@
-import matplotlib.pyplot as plt
+import numpy as np
+import weakref
+from dsp.functions import minmax_envelope
 from dsp.signal import Signal
 from dsp.ticks import Ticks
 
 
 class Grapher:
 
-    def __init__(self, continuous_kwargs = None, discrete_kwargs = None, stem_kwargs = None):
+    def __init__(self, continuous_kwargs = None, discrete_kwargs = None, stem_kwargs = None, decimate = True):
         self._signal = Signal()
         self._ticks = Ticks()
+        self._decimate = decimate
+        self._envelope_cache = {} # Envolventes ya calculadas, por señal, rango y ancho en píxeles
 
         if continuous_kwargs is None:
             continuous_kwargs = {
@@ -83,17 +87,78 @@ class Grapher:
     def stem_kwargs(self, stem_kwargs):
         self._stem_kwargs = stem_kwargs
 
+    @property
+    def decimate(self):
+        return self._decimate
+
+    @decimate.setter
+    def decimate(self, decimate):
+        self._decimate = decimate
+
 
 #############
 ## METHODS ##
 #############
 
 
+    def waveform_trace(self, signal, pixels, time_limits = None):
+        """
+        Gives the points of the waveform of a signal to be drawn in a plot of a certain width. If decimate is True, the samples within time_limits are reduced to the minimum and maximum of each pixel column, which draws the same line at a fraction of the cost. Traces are cached, so plotting the same signal and range again does not scan the samples. The cache only keeps the decimated points and a weak reference to the amplitude_array, so it never keeps a dropped signal alive. Traces are keyed by the generation of the signal, which advances whenever amplitude_array is assigned, as in signal.amplitude_array *= 3. Edits of some samples, as in signal.amplitude_array[:100] = 0, must be followed by signal.touch().
+
+        Args:
+            signal (Signal) Signal to plot.
+            pixels (int) Width in pixels of the plot.
+            time_limits (tuple of float, optional) Visible time range in seconds. The default is the whole signal.
+
+        Returns:
+            (tuple of numpy.ndarray) The times and amplitudes of the points.
+        """
+
+        amplitude_array = signal.amplitude_array
+        start, stop = 0, signal.number_of_samples
+
+        if time_limits is not None:
+            start, stop = signal.sample_range(*time_limits)
+
+        if not self.decimate:
+            indexes = np.arange(start, stop)
+
+            return signal.time_at(indexes), amplitude_array[start:stop]
+
+        key = (id(amplitude_array), signal.generation, signal.time_start, signal.time_step, start, stop, pixels)
+        cached = self._envelope_cache.get(key)
+
+        if cached is not None and cached[0]() is amplitude_array: # El id de un array liberado puede reutilizarse
+            return cached[1], cached[2]
+
+        indexes = minmax_envelope(amplitude_array, pixels, start, stop)
+        x_data = signal.time_at(indexes)
+        y_data = amplitude_array[indexes]
+
+        try:
+            array_reference = weakref.ref(amplitude_array)
+        except TypeError: # Los arrays que no admiten referencias débiles, como las listas, no se guardan
+            return x_data, y_data
+
+        for dead_key in [each_key for each_key, each_value in self._envelope_cache.items() if each_value[0]() is None]:
+            del self._envelope_cache[dead_key]
+
+        if 64 <= len(self._envelope_cache):
+            self._envelope_cache.clear()
+
+        self._envelope_cache[key] = (array_reference, x_data, y_data)
+
+        return x_data, y_data
+
+
     def plot_signal(self, signal):
 
+        import matplotlib.pyplot as plt # Importado al usarse, para que importar dsp no cargue matplotlib
+
         fig, (ax1, ax2, ax3) = plt.subplots(nrows = 3, ncols = 1, figsize = (6, 6))
+        pixels = int(fig.get_size_inches()[0] * fig.dpi)
 
-        ax1.plot(signal.time_array, signal.amplitude_array, **self.continuous_kwargs)
+        ax1.plot(*self.waveform_trace(signal, pixels), **self.continuous_kwargs)
         ax2.plot(signal.frequency_array, signal.X_magnitude_array, **self.discrete_kwargs)
         ax3.plot(signal.frequency_array, signal.X_phase_array, **self.discrete_kwargs)
 
@@ -139,6 +204,8 @@ class Grapher:
 
     def stem_spectrum(self, signal):
 
+        import matplotlib.pyplot as plt
+
         fig, (ax2, ax3) = plt.subplots(nrows=2, ncols=1, figsize=(6, 4))
         fig.suptitle(signal.description, fontsize=12)
 
@@ -173,6 +240,8 @@ class Grapher:
 
     def plot_spectrum(self, signal):
 
+        import matplotlib.pyplot as plt
+
         x_data = signal.frequency_array
         y_left_data = signal.X_magnitude_array
         y_right_data = signal.X_phase_array
@@ -210,19 +279,14 @@ class Grapher:
 
     def plot_waveforms(self, sampling_rate, *signals, truncate_time = True):
 
+        import matplotlib.pyplot as plt
+
         legends_list = []
         frequencies_list = []
 
-        plt.figure(figsize = (6,2))
+        fig = plt.figure(figsize = (6,2))
         plt.grid()
 
-        for i in range(0, len(signals), 1):
-            x_data = signals[i].time_array
-            y_data = signals[i].amplitude_array
-            plt.plot(x_data, y_data, **self.continuous_kwargs)
-            legends_list.append(signals[i].description)
-            frequencies_list.append(signals[i].fundamental_frequency)
-
         min_freq = signals[0].fundamental_frequency
         signal_index = 0
 
@@ -231,21 +295,344 @@ class Grapher:
                 min_freq = signals[i].fundamental_frequency
                 signal_index = i
 
-        number_of_samples = len(signals[signal_index].time_array)
+        pixels = int(fig.get_size_inches()[0] * fig.dpi)
+        time_limits = None
+
+        if truncate_time:
+            time_limits = (min(self.ticks.sinewave_ticks(min_freq)), max(self.ticks.sinewave_ticks(min_freq)))
+
+        for i in range(0, len(signals), 1):
+            x_data, y_data = self.waveform_trace(signals[i], pixels, time_limits)
+            plt.plot(x_data, y_data, **self.continuous_kwargs)
+            legends_list.append(signals[i].description)
+            frequencies_list.append(signals[i].fundamental_frequency)
+
+        number_of_samples = signals[signal_index].number_of_samples
         number_of_periods = int(number_of_samples * min_freq / sampling_rate)
 
+        if truncate_time:
+            number_of_periods = 1 # Solo el primer período es visible, los demás ticks quedarían fuera del gráfico
+
         plt.xticks(
             self.ticks.sinewave_ticks(min_freq, number_of_periods),
             self.ticks.sinewave_labels(min_freq, number_of_periods)
         )
 
         if truncate_time:
-            plt.xlim(
-                min(self.ticks.sinewave_ticks(min_freq)),
-                max(self.ticks.sinewave_ticks(min_freq))
-            )
+            plt.xlim(*time_limits)
 
         plt.legend(legends_list, loc = "upper right")
         graph = plt.gcf()
 
-        return graph
\ No newline at end of file
+        return graph
+
+
+    def plot_spectrogram(self, spectrogram, frequency_array, time_step, time_start = 0, max_columns = 1000, dynamic_range = 80, description = "Spectrogram"):
+        """
+        Plots a (frames x bins) magnitude spectrogram, such as the one of STFT.compute(). Long spectrograms are reduced to at most max_columns columns by keeping the maximum of each group of frames, reading the input a few rows at a time, so it may be a numpy.memmap larger than the available RAM.
+
+        Args:
+            spectrogram (numpy.ndarray) Magnitudes of shape (frames, bins).
+            frequency_array (numpy.ndarray) Frequencies of the bins.
+            time_step (float) Time in seconds between consecutive frames.
+            time_start (float, optional) Time in seconds of the first frame. The default is 0.
+            max_columns (int, optional) Maximum amount of columns drawn. The default is 1000.
+            dynamic_range (float, optional) Range in dB shown below the maximum. The default is 80.
+            description (string, optional) Title of the plot. The default is "Spectrogram".
+
+        Returns:
+            (matplotlib.figure.Figure) Graph.
+        """
+
+        import matplotlib.pyplot as plt
+
+        number_of_frames = len(spectrogram)
+        frames_per_column = max(int(np.ceil(number_of_frames / max_columns)), 1)
+        number_of_columns = int(np.ceil(number_of_frames / frames_per_column))
+        columns = np.empty((number_of_columns, spectrogram.shape[1]), dtype = np.float32)
+        rows_per_read = frames_per_column * max(4096 // frames_per_column, 1) # Se leen grupos enteros de tramas
+
+        for start in range(0, number_of_frames, rows_per_read):
+            chunk = np.asarray(spectrogram[start:start + rows_per_read])
+            first_column = start // frames_per_column
+            groups = np.maximum.reduceat(chunk, np.arange(0, len(chunk), frames_per_column), axis = 0)
+            columns[first_column:first_column + len(groups)] = groups
+
+        with np.errstate(divide = 'ignore'):
+            columns_dB = 20 * np.log10(columns)
+
+        top_dB = np.max(columns_dB) if columns_dB.size else 0
+        column_times = time_start + time_step * frames_per_column * np.arange(number_of_columns)
+
+        fig, axis = plt.subplots(1, 1, figsize = (6, 4))
+        mesh = axis.pcolormesh(
+            column_times,
+            frequency_array,
+            columns_dB.T,
+            shading = 'auto',
+            cmap = 'magma',
+            vmin = top_dB - dynamic_range,
+            vmax = top_dB
+        )
+
+        axis.set_title(description)
+        axis.set_xlabel('Time [s]')
+        axis.set_ylabel('Frequency [Hz]')
+        axis.set_yscale('log')
+        axis.set_ylim(self.ticks.octaves_ticks()[0] / 2, frequency_array[-1])
+        axis.set_yticks(self.ticks.octaves_ticks())
+        axis.set_yticklabels(self.ticks.octaves_labels())
+        fig.colorbar(mesh, ax = axis, label = 'Magnitude [dB]')
+
+        plt.tight_layout()
+        graph = plt.gcf()
+
+        return graph
+
+
+    def figure_template(self, kind = 'signal'):
+        """
+        Builds a figure for headless batch rendering. It has the layout of plot_signal(), plot_spectrum() or stem_spectrum(), but it is drawn with the Agg canvas outside of pyplot, so it is never kept by pyplot's figure manager. The axes, labels and fixed ticks are made once, and the returned function only replaces the data, the ticks that depend on the signal and the legends.
+
+        Args:
+            kind (string, optional) Either 'signal', 'spectrum' or 'stem'. The default is 'signal'.
+
+        Returns:
+            (tuple) The matplotlib.figure.Figure and a function that takes a Signal and updates the figure with it.
+        """
+
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        if kind not in ('signal', 'spectrum', 'stem'):
+            raise ValueError("The parameter kind must be either 'signal', 'spectrum' or 'stem'.")
+
+        octaves_ticks = self.ticks.octaves_ticks() # Ticks fijos, calculados una sola vez
+        octaves_labels = self.ticks.octaves_labels()
+        is_laid_out = [False]
+
+        if kind == 'signal':
+            fig = Figure(figsize = (6, 6))
+            FigureCanvasAgg(fig)
+            ax1, ax2, ax3 = fig.subplots(nrows = 3, ncols = 1)
+            pixels = int(fig.get_size_inches()[0] * fig.dpi)
+            degrees_ticks = self.ticks.degrees_ticks(90)
+
+            line1, = ax1.plot([], [], **self.continuous_kwargs)
+            line2, = ax2.plot([], [], **self.discrete_kwargs)
+            line3, = ax3.plot([], [], **self.discrete_kwargs)
+
+            ax1.set_title('Waveform')
+            ax2.set_title('Spectrum Amplitude')
+            ax3.set_title('Spectrum Phase')
+
+            ax1.set_xlabel('Time [s]')
+            ax2.set_xlabel('Frequency [Hz]')
+            ax3.set_xlabel('Frequency [Hz]')
+
+            ax1.set_ylabel('x(t) Amplitude')
+            ax2.set_ylabel('X(f) Amplitude')
+            ax3.set_ylabel('Phase [deg]')
+
+            ax1.set_xscale('linear')
+            ax2.set_xscale('log')
+            ax3.set_xscale('log')
+
+            ax1.grid(True)
+            ax2.grid(True)
+            ax3.grid(True)
+
+            legends = [ax1.legend([line1], ['']), ax2.legend([line2], ['']), ax3.legend([line3], [''])]
+
+            def update(signal):
+                line1.set_data(*self.waveform_trace(signal, pixels))
+                line2.set_data(signal.frequency_array, signal.X_magnitude_array)
+                line3.set_data(signal.frequency_array, signal.X_phase_array)
+
+                for axis in (ax1, ax2, ax3):
+                    axis.relim()
+                    axis.autoscale_view()
+
+                ax1.set_xticks(self.ticks.sinewave_ticks(signal.fundamental_frequency))
+                ax2.set_xticks(octaves_ticks, octaves_labels)
+                ax3.set_xticks(octaves_ticks, octaves_labels)
+                ax2.set_yticks(self.ticks.zero_to_max_ticks(signal.X_magnitude_array))
+                ax3.set_yticks(degrees_ticks)
+
+                for legend in legends:
+                    legend.get_texts()[0].set_text(signal.description)
+
+                if not is_laid_out[0]:
+                    fig.tight_layout()
+                    is_laid_out[0] = True
+
+                return
+
+        elif kind == 'spectrum':
+            fig = Figure(figsize = (6, 4))
+            FigureCanvasAgg(fig)
+            left_axis = fig.subplots(1, 1)
+            right_axis = left_axis.twinx()
+            degrees_ticks = self.ticks.degrees_ticks()
+
+            left_line, = left_axis.plot([], [], color = 'black')
+            right_line, = right_axis.plot([], [], color = 'black', linestyle = '--')
+
+            left_axis.set_xlabel("Frequency [Hz]")
+            left_axis.set_ylabel("Magnitude [dB]")
+            right_axis.set_ylabel("Phase [deg]")
+
+            left_axis.set_xscale("log")
+            left_axis.set_yscale("linear")
+            right_axis.set_yscale("linear")
+
+            left_axis.legend(["Frequency"], loc='lower left')
+            right_axis.legend(["Phase"], loc='lower right')
+            left_axis.grid()
+
+            def update(signal):
+                left_line.set_data(signal.frequency_array, signal.X_magnitude_array)
+                right_line.set_data(signal.frequency_array, signal.X_phase_array)
+
+                for axis in (left_axis, right_axis):
+                    axis.relim()
+                    axis.autoscale_view()
+
+                left_axis.set_xticks(octaves_ticks, octaves_labels)
+                right_axis.set_yticks(degrees_ticks, degrees_ticks)
+                left_axis.set_title(signal.description + " frequency spectrum")
+
+                if not is_laid_out[0]:
+                    fig.tight_layout()
+                    is_laid_out[0] = True
+
+                return
+
+        else:
+            fig = Figure(figsize = (6, 4))
+            FigureCanvasAgg(fig)
+            ax2, ax3 = fig.subplots(nrows=2, ncols=1)
+            title = fig.suptitle('', fontsize=12)
+            degrees_ticks = self.ticks.degrees_ticks(90)
+
+            stems = [ax2.stem([0], [0], **self.stem_kwargs), ax3.stem([0], [0], **self.stem_kwargs)]
+
+            for markerline, stemlines, baseline in stems:
+                stemlines.set_linewidth(1)
+
+            ax2.set_ylabel('Amplitude')
+            ax3.set_ylabel('Phase [deg]')
+            ax2.yaxis.set_label_position('right')
+            ax3.yaxis.set_label_position('right')
+
+            ax2.set_xscale('linear')
+            ax3.set_xscale('linear')
+
+            ax2.grid(True)
+            ax3.grid(True)
+
+            def update(signal):
+                x_data = np.asarray(signal.frequency_array)
+
+                for (markerline, stemlines, baseline), y_data in zip(stems, (signal.X_magnitude_array, signal.X_phase_array)):
+                    y_data = np.asarray(y_data)
+                    markerline.set_data(x_data, y_data)
+                    stemlines.set_segments(np.stack((np.stack((x_data, np.zeros(len(x_data))), axis = 1), np.stack((x_data, y_data), axis = 1)), axis = 1))
+                    baseline.set_data([np.min(x_data), np.max(x_data)], [0, 0])
+
+                for axis in (ax2, ax3):
+                    axis.relim()
+                    axis.autoscale_view()
+
+                ax2.set_yticks(self.ticks.zero_to_max_ticks(signal.X_magnitude_array))
+                ax3.set_yticks(degrees_ticks)
+                title.set_text(signal.description)
+
+                if not is_laid_out[0]:
+                    fig.tight_layout()
+                    is_laid_out[0] = True
+
+                return
+
+        return fig, update
+
+
+    def render_chunk(self, signals, file_names, archive, kind = 'signal'):
+        """
+        Renders many signals into one figure template and saves each one through an Archive. The figure is cleared when the chunk ends, even after an error, so no figure outlives the call.
+
+        Args:
+            signals (list of Signal) Signals to plot.
+            file_names (list of string) File name of each plot, without extension.
+            archive (Archive) Archive whose save_plot() writes the files.
+            kind (string, optional) Either 'signal', 'spectrum' or 'stem'. The default is 'signal'.
+
+        Returns:
+            None.
+        """
+
+        fig, update = self.figure_template(kind)
+
+        try:
+            for signal, file_name in zip(signals, file_names):
+                update(signal)
+                pending_write = archive.save_plot(fig, file_name)
+
+                if pending_write is not None:
+                    pending_write.result() # La figura se reutiliza, debe estar guardada antes de actualizarla
+        finally:
+            fig.clear()
+
+        return
+
+
+    def render_batch(self, signals, archive, kind = 'signal', file_names = None, processes = None, chunk_size = None):
+        """
+        Renders and saves the plots of many signals without pyplot. The signals are split in chunks and each chunk reuses a single figure template, see figure_template(). With more than one process, the chunks are rendered in parallel by a process pool.
+
+        Args:
+            signals (list of Signal) Signals to plot.
+            archive (Archive) Archive whose save_plot() writes the files.
+            kind (string, optional) Either 'signal', 'spectrum' or 'stem'. The default is 'signal'.
+            file_names (list of string, optional) File name of each plot, without extension. The default is kind followed by the index of the signal.
+            processes (int, optional) Amount of worker processes. The default is None, which renders in the current process.
+            chunk_size (int, optional) Amount of signals sent to a worker at once. The default splits the signals in four chunks per process.
+
+        Returns:
+            (list of string) File names of the saved plots.
+        """
+
+        signals = list(signals)
+
+        if file_names is None:
+            file_names = [f'{kind} {i}' for i in range(0, len(signals), 1)]
+
+        file_names = list(file_names)
+
+        if processes is None or processes <= 1:
+            self.render_chunk(signals, file_names, archive, kind)
+
+            return file_names
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        if chunk_size is None:
+            chunk_size = max(int(np.ceil(len(signals) / (4 * processes))), 1)
+
+        with ProcessPoolExecutor(max_workers = processes) as executor:
+            futures = [
+                executor.submit(self.render_chunk, signals[i:i + chunk_size], file_names[i:i + chunk_size], archive, kind)
+                for i in range(0, len(signals), chunk_size)
+            ]
+
+            for future in futures:
+                future.result()
+
+        return file_names
+
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_envelope_cache'] = {} # Las referencias débiles no se pueden enviar a otros procesos
+
+        return state
\ No newline at end of file
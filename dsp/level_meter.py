@@ -0,0 +1,187 @@
+import numpy as np
+from dsp.filter import SPL
+
+
+class LevelMeter:
+
+    def __init__(self, sampling_rate = 48000, time_weighting = 'F', interval = 0.125, p_ref = 0.00002):
+        self._sampling_rate = sampling_rate
+        self._time_weighting = time_weighting
+        self._interval = interval
+        self._p_ref = p_ref
+        self._time_constants = {'F': 0.125, 'S': 1, 'I': 0.035}
+        self._impulse_decay = 1.5
+        self.reset()
+
+
+#######################
+## GETTERS & SETTERS ##
+#######################
+
+
+    @property
+    def sampling_rate(self):
+        return self._sampling_rate
+
+    @sampling_rate.setter
+    def sampling_rate(self, sampling_rate):
+        self._sampling_rate = sampling_rate
+
+    @property
+    def time_weighting(self):
+        return self._time_weighting
+
+    @time_weighting.setter
+    def time_weighting(self, time_weighting):
+        self._time_weighting = time_weighting
+
+    @property
+    def interval(self):
+        return self._interval
+
+    @interval.setter
+    def interval(self, interval):
+        self._interval = interval
+
+    @property
+    def p_ref(self):
+        return self._p_ref
+
+    @p_ref.setter
+    def p_ref(self, p_ref):
+        self._p_ref = p_ref
+
+    @property
+    def time_constants(self):
+        return self._time_constants
+
+    @time_constants.setter
+    def time_constants(self, time_constants):
+        self._time_constants = time_constants
+
+    @property
+    def impulse_decay(self):
+        return self._impulse_decay
+
+    @impulse_decay.setter
+    def impulse_decay(self, impulse_decay):
+        self._impulse_decay = impulse_decay
+
+    @property
+    def elapsed_time(self):
+        return self._sample_count / self.sampling_rate
+
+    @property
+    def level(self):
+        return self.to_level(self._weighted_square)
+
+    @property
+    def leq(self):
+        return self.to_level(self._energy_sum / max(self._sample_count, 1))
+
+
+#############
+## METHODS ##
+#############
+
+
+    def reset(self):
+        self._weighted_square = 0 # Presión cuadrática ponderada en el tiempo, por canal
+        self._filter_state = 0 # Salida del filtro exponencial en la última muestra
+        self._impulse_hold = 0 # Detector de picos del ponderado Impulse
+        self._energy_sum = 0 # Suma de la presión cuadrática desde el reset
+        self._sample_count = 0
+        self._interval_energy = 0 # Suma de la presión cuadrática del intervalo en curso
+        self._interval_count = 0
+
+        return
+
+
+    def to_level(self, mean_square):
+        with np.errstate(divide = 'ignore'):
+            level = SPL(np.sqrt(mean_square), self.p_ref)
+
+        return level
+
+
+    def process(self, block):
+        """
+        Consumes a block of pressure samples and updates the running accumulators. The time weighting is applied with a vectorized recursive filter whose state is carried between blocks, so splitting the input in blocks does not change the result.
+
+        Args:
+            block (numpy.ndarray) Pressure [Pa] samples. A block of shape (channels, samples) is metered channel by channel.
+
+        Returns:
+            (tuple of numpy.ndarray) The time-weighted levels at the end of every interval completed within the block, and the Leq of each one of those intervals. The last axis enumerates the intervals and may be empty.
+        """
+
+        squared_block = np.asarray(block, dtype = float) ** 2
+        weighted_block = self.weight(squared_block)
+
+        interval_samples = max(int(round(self.interval * self.sampling_rate)), 1)
+        number_of_samples = squared_block.shape[-1]
+        first_end = interval_samples - self._interval_count - 1
+        ends = np.arange(first_end, number_of_samples, interval_samples) # Índices donde termina cada intervalo
+
+        cumulative_energy = np.cumsum(squared_block, axis = -1)
+        energy_at_ends = cumulative_energy[..., ends]
+        interval_energies = np.diff(energy_at_ends, axis = -1, prepend = 0)
+
+        if 0 < len(ends):
+            interval_energies[..., 0] = interval_energies[..., 0] + self._interval_energy
+            self._interval_energy = cumulative_energy[..., -1] - energy_at_ends[..., -1]
+            self._interval_count = number_of_samples - 1 - ends[-1]
+        elif 0 < number_of_samples:
+            self._interval_energy = self._interval_energy + cumulative_energy[..., -1]
+            self._interval_count = self._interval_count + number_of_samples
+
+        if 0 < number_of_samples:
+            self._weighted_square = weighted_block[..., -1]
+            self._energy_sum = self._energy_sum + cumulative_energy[..., -1]
+            self._sample_count = self._sample_count + number_of_samples
+
+        interval_levels = self.to_level(weighted_block[..., ends])
+        interval_leqs = self.to_level(interval_energies / interval_samples)
+
+        return interval_levels, interval_leqs
+
+
+    def weight(self, squared_block):
+        """
+        Applies the exponential time weighting to a block of squared pressure. Fast (F) and Slow (S) are one-pole lowpass filters. Impulse (I) rises with a 35 ms time constant and decays with a 1.5 s one, through a peak detector whose recursion h[n] = max(r[n], d * h[n-1]) is solved at once as a cumulative maximum in the logarithmic domain.
+
+        Args:
+            squared_block (numpy.ndarray) Squared pressure samples.
+
+        Returns:
+            (numpy.ndarray) Time-weighted squared pressure.
+        """
+
+        from scipy import signal
+
+        if self.time_weighting not in self.time_constants:
+            raise ValueError(f'The time weighting must be one of {list(self.time_constants)}.')
+
+        a = np.exp(-1 / (self.time_constants[self.time_weighting] * self.sampling_rate))
+        zi = a * np.broadcast_to(self._filter_state, squared_block.shape[:-1])[..., np.newaxis]
+        weighted_block, zf = signal.lfilter([1 - a], [1, -a], squared_block, axis = -1, zi = zi)
+
+        if 0 < squared_block.shape[-1]:
+            self._filter_state = weighted_block[..., -1]
+
+        if self.time_weighting == 'I':
+            log_d = -1 / (self.impulse_decay * self.sampling_rate)
+            n = np.arange(squared_block.shape[-1])
+
+            with np.errstate(divide = 'ignore'):
+                log_rise = np.log(weighted_block) - n * log_d
+                log_held = np.log(self._impulse_hold) + log_d
+
+            log_hold = np.maximum(np.maximum.accumulate(log_rise, axis = -1), np.expand_dims(log_held, -1)) + n * log_d
+
+            weighted_block = np.exp(log_hold)
+
+            if 0 < len(n):
+                self._impulse_hold = weighted_block[..., -1]
+
+        return weighted_block
\ No newline at end of file
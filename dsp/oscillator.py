@@ -0,0 +1,140 @@
+import numpy as np
+from fractions import Fraction
+
+
+class Oscillator:
+
+    def __init__(self, frequency = 1000, amplitude = 1, phase = 0, sampling_rate = 48000, block_size = 4096):
+        self._frequency = frequency
+        self._amplitude = amplitude
+        self._phase = phase
+        self._sampling_rate = sampling_rate
+        self._block_size = block_size
+        self._sample_index = 0
+        self._cycles_offset = Fraction(0) # Fase acumulada (en ciclos) al cambiar de frecuencia
+
+
+#######################
+## GETTERS & SETTERS ##
+#######################
+
+
+    @property
+    def frequency(self):
+        return self._frequency
+
+    @frequency.setter
+    def frequency(self, frequency):
+        self._cycles_offset = (self.cycles_at(self._sample_index) - self._sample_index * Fraction(frequency) / Fraction(self.sampling_rate)) % 1 # Mantiene la continuidad de fase
+        self._frequency = frequency
+
+    @property
+    def amplitude(self):
+        return self._amplitude
+
+    @amplitude.setter
+    def amplitude(self, amplitude):
+        self._amplitude = amplitude
+
+    @property
+    def phase(self):
+        return self._phase
+
+    @phase.setter
+    def phase(self, phase):
+        self._phase = phase
+
+    @property
+    def sampling_rate(self):
+        return self._sampling_rate
+
+    @sampling_rate.setter
+    def sampling_rate(self, sampling_rate):
+        self._sampling_rate = sampling_rate
+
+    @property
+    def block_size(self):
+        return self._block_size
+
+    @block_size.setter
+    def block_size(self, block_size):
+        self._block_size = block_size
+
+    @property
+    def sample_index(self):
+        return self._sample_index
+
+
+#############
+## METHODS ##
+#############
+
+
+    def cycles_at(self, sample_index):
+        """
+        Calculates the exact amount of cycles elapsed until a given sample, as a rational number, so the phase never drifts no matter how long the oscillator runs.
+
+        Args:
+            sample_index (int) Index of the sample since the last reset.
+
+        Returns:
+            (fractions.Fraction) Elapsed cycles.
+        """
+
+        return self._cycles_offset + sample_index * Fraction(self.frequency) / Fraction(self.sampling_rate)
+
+
+    def read(self, number_of_samples = None):
+        """
+        Generates the next samples of the sinewave. The phase of the first sample is computed exactly from the amount of samples already read, so consecutive calls join seamlessly for any frequency, even if a period does not fit an integer amount of samples.
+
+        Args:
+            number_of_samples (int, optional) Amount of samples to generate. The default is block_size.
+
+        Returns:
+            (numpy.ndarray) Block of samples.
+        """
+
+        if number_of_samples is None:
+            number_of_samples = self.block_size
+
+        start_cycles = float(self.cycles_at(self._sample_index) % 1)
+        cycles_per_sample = self.frequency / self.sampling_rate
+        phase_rad = self.phase * (np.pi / 180)
+
+        cycles = start_cycles + cycles_per_sample * np.arange(number_of_samples)
+        block = self.amplitude * np.sin(2 * np.pi * cycles + phase_rad)
+        self._sample_index = self._sample_index + number_of_samples
+
+        return block
+
+
+    def blocks(self, duration):
+        """
+        Yields consecutive blocks of block_size samples until a given duration is reached. The result can be used as the source of a Stream.
+
+        Args:
+            duration (float) Duration in seconds of the generated tone.
+
+        Yields:
+            (numpy.ndarray) Block of samples. The last one may be shorter than block_size.
+        """
+
+        remaining_samples = int(round(duration * self.sampling_rate))
+
+        while 0 < remaining_samples:
+            number_of_samples = min(self.block_size, remaining_samples)
+            remaining_samples = remaining_samples - number_of_samples
+            yield self.read(number_of_samples)
+
+
+    def __iter__(self):
+        while True:
+            yield self.read()
+
+
+    def reset(self):
+        self._sample_index = 0
+        self._cycles_offset = Fraction(0)
+
+        return
\ No newline at end of file
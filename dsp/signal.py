@@ -1,4 +1,6 @@
 import numpy as np
+from dsp.functions import periodic_extend
+from dsp.stream import Stream
 
 
 class Signal:
@@ -7,11 +9,16 @@ class Signal:
         self._fundamental_frequency = -1
         self._fundamental_amplitude = -1
         self._fundamental_phase = -1
-        self._time_array = np.array([])
+        self._time_start = 0
+        self._time_step = 1
+        self._number_of_samples = 0
+        self._time_array = None
         self._amplitude_array = np.array([])
-        self._frequency_array = np.array([])
-        self._X_magnitude_array = np.array([])
-        self._X_phase_array = np.array([])
+        self._frequency_array = None # None hasta que se asigne, mientras tanto se calcula desde amplitude_array
+        self._X_magnitude_array = None
+        self._X_phase_array = None
+        self._spectrum_cache = None
+        self._generation = 0 # Cambia con cada amplitude_array, para invalidar las trazas guardadas
         self._description = "N/A"
 
 
@@ -44,13 +51,62 @@ class Signal:
     def fundamental_phase(self, fundamental_phase):
         self._fundamental_phase = fundamental_phase
 
+    @property
+    def time_start(self):
+        return self._time_start
+
+    @time_start.setter
+    def time_start(self, time_start):
+        self._time_start = time_start
+
+    @property
+    def time_step(self):
+        return self._time_step
+
+    @time_step.setter
+    def time_step(self, time_step):
+        self._time_step = time_step
+        self._spectrum_cache = None # El eje de frecuencias depende del paso temporal
+
+    @property
+    def sampling_rate(self):
+        return 1 / self._time_step
+
+    @sampling_rate.setter
+    def sampling_rate(self, sampling_rate):
+        self._time_step = 1 / sampling_rate
+        self._spectrum_cache = None
+
+    @property
+    def number_of_samples(self):
+        return self._number_of_samples
+
+    @number_of_samples.setter
+    def number_of_samples(self, number_of_samples):
+        self._number_of_samples = number_of_samples
+
     @property
     def time_array(self):
-        return self._time_array
+        if self._time_array is not None:
+            return self._time_array
+
+        return self.time_start + self.time_step * np.arange(self.number_of_samples) # Se genera al leerlo, no se almacena
 
     @time_array.setter
     def time_array(self, time_array):
-        self._time_array = time_array
+        time_array = np.asarray(time_array)
+        self._number_of_samples = len(time_array)
+        self._time_array = None
+
+        if 0 < len(time_array):
+            self._time_start = time_array[0]
+
+        if 1 < len(time_array):
+            self._time_step = (time_array[-1] - time_array[0]) / (len(time_array) - 1)
+            self._spectrum_cache = None
+
+            if not np.allclose(time_array, self.time_array, rtol = 0, atol = 1e-9 * abs(self._time_step)):
+                self._time_array = time_array # Eje no uniforme, se guarda tal cual
 
     @property
     def amplitude_array(self):
@@ -59,9 +115,19 @@ class Signal:
     @amplitude_array.setter
     def amplitude_array(self, amplitude_array):
         self._amplitude_array = amplitude_array
+        self._number_of_samples = np.shape(amplitude_array)[-1]
+        self._spectrum_cache = None
+        self._generation = self._generation + 1
+
+    @property
+    def generation(self):
+        return self._generation
 
     @property
     def frequency_array(self):
+        if self._frequency_array is None:
+            return self.computed_spectrum()[0]
+
         return self._frequency_array
 
     @frequency_array.setter
@@ -70,6 +136,9 @@ class Signal:
 
     @property
     def X_magnitude_array(self):
+        if self._X_magnitude_array is None:
+            return self.computed_spectrum()[1]
+
         return self._X_magnitude_array
 
     @X_magnitude_array.setter
@@ -78,6 +147,9 @@ class Signal:
 
     @property
     def X_phase_array(self):
+        if self._X_phase_array is None:
+            return self.computed_spectrum()[2]
+
         return self._X_phase_array
 
     @X_phase_array.setter
@@ -102,28 +174,67 @@ class Signal:
         self.fundamental_frequency = origin.fundamental_frequency
         self.fundamental_amplitude = origin.fundamental_amplitude
         self.fundamental_phase = origin.fundamental_phase
-        self.time_array = origin.time_array                             # Used for waveform: t
+        self.time_start = origin.time_start                             # Used for waveform: t
+        self.time_step = origin.time_step                               # Used for waveform: t
+        self._time_array = origin._time_array                           # Used for waveform: t, only if it is not uniform
         self.amplitude_array = origin.amplitude_array                   # Used for waveform: x(t)
-        self.frequency_array = origin.frequency_array                   # Used for spectrum: f
-        self.X_magnitude_array = origin.X_magnitude_array               # Used for spectrum: X(f)
-        self.X_phase_array = origin.X_phase_array                       # Used for spectrum: Q(f)
+        self.number_of_samples = origin.number_of_samples
+        self._frequency_array = origin._frequency_array                 # Used for spectrum: f
+        self._X_magnitude_array = origin._X_magnitude_array             # Used for spectrum: X(f)
+        self._X_phase_array = origin._X_phase_array                     # Used for spectrum: Q(f)
+        self._spectrum_cache = origin._spectrum_cache
         self.description = origin.description
 
         return
 
 
-    def load_spectrum(self, path):
+    def touch(self):
+        """
+        Tells the signal that its amplitude_array was edited in place, as in signal.amplitude_array[:100] = 0, which does not go through the setter. It clears the computed spectrum and advances the generation, so traces cached by Grapher are drawn again.
+
+        Returns:
+            None.
+        """
+
+        self._spectrum_cache = None
+        self._generation = self._generation + 1
+
+        return
+
+
+    def computed_spectrum(self):
+        """
+        Computes the spectrum of the amplitude_array with filter.fft(). The result is cached until a new amplitude_array or time step is set, so reading the spectrum arrays many times only computes it once. Spectrum arrays that were assigned explicitly, as the ones of Generator.sinewave(), take precedence over this one.
+
+        Returns:
+            (tuple of numpy.ndarray) The frequency, magnitude and phase (in degrees) arrays.
+        """
+
+        if self._spectrum_cache is None:
+            if self.number_of_samples == 0:
+                self._spectrum_cache = (np.array([]), np.array([]), np.array([]))
+            else:
+                from dsp.filter import fft # Importado al usarse, para no cargar scipy con cada Signal
+
+                X_frequencies, X_magnitude, X_phase = fft(self.amplitude_array, self.sampling_rate)
+                self._spectrum_cache = (X_frequencies, X_magnitude, np.degrees(X_phase))
+
+        return self._spectrum_cache
+
+
+    def load_spectrum(self, path, mmap_mode = None):
         """
         Loads a signal from a NumPy binary file.
 
         Args:
             path (string) The file path to the NumPy binary file containing the signal data. The path should include the file name with the .npy extension.
+            mmap_mode (string, optional) Memory-map mode of numpy.load(), such as 'r'. If given, the file is not read into RAM: frequency_array, X_magnitude_array and X_phase_array are views of its rows and only the touched pages are read. The default is None.
 
         Returns:
             None.
         """
 
-        signal = np.load(path)
+        signal = np.load(path, mmap_mode = mmap_mode)
 
         self.frequency_array = signal[0,:]
         self.X_magnitude_array = signal[1,:]
@@ -132,26 +243,254 @@ class Signal:
         return
 
 
-    def extend(self, new_duration):
+    def load_waveform(self, path, sampling_rate = None, mmap_mode = None):
         """
-        Increase the signal's domain by extending the time array and generating a new amplitude_array.
+        Loads a waveform from a NumPy binary file. The file may contain either a 1D array of amplitudes or a 2xN array whose rows are the time and the amplitude arrays.
 
         Args:
-            new_duration (float): The desired duration in seconds for the new time domain.
+            path (string) The file path to the NumPy binary file containing the signal data. The path should include the file name with the .npy extension.
+            sampling_rate (float, optional) Sampling rate of a 1D file. It is ignored for 2xN files, whose time axis is taken from the first row. The default keeps the current sampling_rate of the signal.
+            mmap_mode (string, optional) Memory-map mode of numpy.load(), such as 'r'. If given, the file is not read into RAM and amplitude_array is a view of it. The default is None.
+
+        Returns:
+            None.
+        """
+
+        signal = np.load(path, mmap_mode = mmap_mode)
+
+        if signal.ndim == 1:
+            self.time_start = 0
+
+            if sampling_rate is not None:
+                self.sampling_rate = sampling_rate
+
+            self._time_array = None
+            self.amplitude_array = signal
+        else:
+            number_of_samples = signal.shape[1]
+            self.time_start = signal[0,0]
+
+            if 1 < number_of_samples:
+                self.time_step = (signal[0,-1] - signal[0,0]) / (number_of_samples - 1) # Solo se leen las muestras extremas del eje
+
+            self._time_array = None
+            self.amplitude_array = signal[1,:]
+
+        return
+
+
+    def get_record(self):
+        """
+        Gives the metadata and the arrays that define the signal, as stored by SignalArchive. The time_array is only included if it is not uniform, and the spectrum arrays only if they were assigned explicitly, since the other ones are obtained again from the rest of the record.
+
+        Returns:
+            (tuple of dict) The metadata, with plain Python values, and the arrays by name.
+        """
+
+        metadata = {
+            'fundamental_frequency': float(self.fundamental_frequency),
+            'fundamental_amplitude': float(self.fundamental_amplitude),
+            'fundamental_phase': float(self.fundamental_phase),
+            'time_start': float(self.time_start),
+            'time_step': float(self.time_step),
+            'description': str(self.description)
+        }
+
+        arrays = {'amplitude_array': self.amplitude_array}
+        optional_arrays = {
+            'time_array': self._time_array,
+            'frequency_array': self._frequency_array,
+            'X_magnitude_array': self._X_magnitude_array,
+            'X_phase_array': self._X_phase_array
+        }
+
+        for name, array in optional_arrays.items():
+            if array is not None:
+                arrays[name] = array
+
+        return metadata, arrays
+
+
+    def set_record(self, metadata, arrays):
+        """
+        Restores the signal from a record given by get_record().
+
+        Args:
+            metadata (dict): Metadata of the record.
+            arrays (dict): Arrays of the record by name. They may be memory-mapped.
 
         Returns:
             None.
         """
 
-        if new_duration != 1 / self.fundamental_frequency:
-            samples_before = len(self.time_array)
-            samples_after = int(new_duration * len(self.time_array) / self.time_array[-1])
-            samples_increment = samples_after - samples_before
+        self.fundamental_frequency = metadata['fundamental_frequency']
+        self.fundamental_amplitude = metadata['fundamental_amplitude']
+        self.fundamental_phase = metadata['fundamental_phase']
+        self.time_start = metadata['time_start']
+        self.time_step = metadata['time_step']
+        self.description = metadata['description']
+        self.amplitude_array = arrays['amplitude_array']
+        self._time_array = arrays.get('time_array')
+        self._frequency_array = arrays.get('frequency_array')
+        self._X_magnitude_array = arrays.get('X_magnitude_array')
+        self._X_phase_array = arrays.get('X_phase_array')
+
+        return
+
+
+    def iter_blocks(self, block_size = 4096, hop_size = None, pad_last = False):
+        """
+        Iterates over the amplitude_array in blocks, so it can be processed with bounded memory.
+
+        Args:
+            block_size (int, optional): Amount of samples of each block. The default is 4096.
+            hop_size (int, optional): Amount of samples between the starts of consecutive blocks. A value lower than block_size makes the blocks overlap. The default is block_size.
+            pad_last (bool, optional): Whether to complete the last block with zeros. The default is False.
+
+        Returns:
+            (Stream) Iterable of blocks of the amplitude_array.
+        """
+
+        return Stream(self.amplitude_array, block_size, hop_size, self.sampling_rate, pad_last)
+
+
+    def time_at(self, indexes):
+        """
+        Gives the time of some samples without building the whole time_array.
+
+        Args:
+            indexes (numpy.ndarray): Indexes of the samples.
+
+        Returns:
+            (numpy.ndarray) Times in seconds of the samples.
+        """
+
+        if self._time_array is not None:
+            return self._time_array[indexes]
+
+        return self.time_start + self.time_step * np.asarray(indexes)
+
+
+    def values_at(self, time_array, chunk_size = 2 ** 20):
+        """
+        Evaluates the periodic waveform of the signal at arbitrary instants, such as the ones of a time axis with another sampling rate. Signals with an explicit line spectrum, as the ones of Generator.sinewave(), are synthesized from it, so the values are exact. Otherwise, the samples of the first period are interpolated linearly.
+
+        All partials are synthesized at once. If the instants are uniformly spaced, they are split into blocks of about sqrt(len(time_array)) instants and each partial is written as sin(w * (t_block + tau) + phase) = sin(w * t_block + phase) * cos(w * tau) + cos(w * t_block + phase) * sin(w * tau), so the sines are only computed at the block starts and offsets and the sum over the partials becomes two matrix products.
+
+        Args:
+            time_array (numpy.ndarray): Instants in seconds.
+            chunk_size (int, optional): Amount of values computed at once when synthesizing a line spectrum. The temporary memory is about chunk_size floats, no matter the amount of partials or instants. The default is 2 ** 20.
+
+        Returns:
+            (numpy.ndarray) Amplitudes at the given instants.
+        """
+
+        time_array = np.asarray(time_array, dtype = float)
+
+        if self._frequency_array is not None and self._X_magnitude_array is not None and self._X_phase_array is not None:
+            omegas = 2 * np.pi * np.asarray(self._frequency_array, dtype = float)
+            phases_rad = np.radians(np.asarray(self._X_phase_array, dtype = float))
+            magnitudes = np.asarray(self._X_magnitude_array, dtype = float)
+            instants = time_array.reshape(-1)
+            number_of_instants = len(instants)
+            values = np.zeros(number_of_instants)
+            step = (instants[-1] - instants[0]) / (number_of_instants - 1) if 2 < number_of_instants else 0
+
+            if step != 0 and np.allclose(np.diff(instants), step, rtol = 0, atol = 1e-9 * abs(step)):
+                block_length = int(np.ceil(np.sqrt(number_of_instants)))
+                number_of_blocks = int(np.ceil(number_of_instants / block_length))
+                offsets = np.arange(block_length) * step
+                block_starts = instants[::block_length]
+                partials_per_chunk = max(chunk_size // (2 * (number_of_blocks + block_length)), 1)
+                blocks = np.zeros((number_of_blocks, block_length))
+
+                for start in range(0, len(magnitudes), partials_per_chunk):
+                    stop = min(start + partials_per_chunk, len(magnitudes))
+                    start_angles = omegas[start:stop, np.newaxis] * block_starts + phases_rad[start:stop, np.newaxis]
+                    offset_angles = omegas[start:stop, np.newaxis] * offsets
+                    weights = magnitudes[start:stop, np.newaxis]
+                    blocks += (weights * np.sin(start_angles)).T @ np.cos(offset_angles) # Suma de todos los parciales con BLAS
+                    blocks += (weights * np.cos(start_angles)).T @ np.sin(offset_angles)
+
+                values = blocks.reshape(-1)[:number_of_instants]
+            else:
+                instants_per_chunk = max(chunk_size // max(len(magnitudes), 1), 1)
+
+                for start in range(0, number_of_instants, instants_per_chunk):
+                    stop = min(start + instants_per_chunk, number_of_instants)
+                    values[start:stop] = magnitudes @ np.sin(omegas[:, np.newaxis] * instants[start:stop] + phases_rad[:, np.newaxis])
+
+            return values.reshape(time_array.shape)
+
+        return np.interp(
+            time_array - self.time_start,
+            self.time_array - self.time_start,
+            self.amplitude_array,
+            period = 1 / self.fundamental_frequency
+        )
+
+
+    def sample_range(self, start_time, stop_time):
+        """
+        Finds the samples that lie between two instants, including the ones right outside them so a plotted trace reaches the edges.
+
+        Args:
+            start_time (float): First instant in seconds.
+            stop_time (float): Last instant in seconds.
+
+        Returns:
+            (tuple of int) The start and stop indexes, to be used as a slice.
+        """
+
+        if self._time_array is not None:
+            start = np.searchsorted(self._time_array, start_time, side = "right") - 1
+            stop = np.searchsorted(self._time_array, stop_time, side = "left") + 1
+        else:
+            start = int(np.floor((start_time - self.time_start) / self.time_step))
+            stop = int(np.ceil((stop_time - self.time_start) / self.time_step)) + 1
+
+        start = min(max(int(start), 0), self.number_of_samples)
+        stop = min(max(int(stop), start), self.number_of_samples)
+
+        return start, stop
+
+
+    def extend(self, new_duration, mode = "wrap", in_place = True, number_of_samples = None):
+        """
+        Increase the signal's domain by extending the implicit time axis and repeating the period of the amplitude_array. The new arrays are preallocated and filled at once, instead of growing them sample by sample.
+
+        Args:
+            new_duration (float): The desired duration in seconds for the new time domain.
+            mode (string, optional): Either "wrap" or "tile". The "wrap" mode assumes that the last sample closes the period, as in the arrays made by Generator.linspace_time_array(), so it is skipped when repeating. The "tile" mode repeats the whole array as it is. The default is "wrap".
+            in_place (bool, optional): If True, the arrays of the signal are replaced. If False, the signal remains unchanged and an extended copy is returned. The default is True.
+            number_of_samples (int, optional): Exact length of the new arrays. If given, it takes precedence over the length derived from new_duration. The default is None.
+
+        Returns:
+            None if in_place is True, otherwise the extended Signal.
+        """
+
+        if mode not in ("wrap", "tile"):
+            raise ValueError('The parameter mode must be either "wrap" or "tile".')
+
+        signal = self
+
+        if not in_place:
+            signal = Signal()
+            signal.copy_from(self)
+
+        samples_before = self.number_of_samples
+        last_time = self.time_start + self.time_step * (samples_before - 1)
+        samples_after = number_of_samples
+
+        if samples_after is None:
+            samples_after = int(round(new_duration * samples_before / last_time))
+
+        if samples_before < samples_after:
+            period_length = samples_before - int(mode == "wrap")
+            signal._time_array = None
+            signal.amplitude_array = periodic_extend(self.amplitude_array, samples_after, period_length)
 
-            for i in range(0, samples_increment, 1):
-                steps_lenght = self.time_array[1]
-                time_increment = self.time_array[-1] + steps_lenght
-                self.time_array = np.append(self.time_array, time_increment)
-                self.amplitude_array = np.append(self.amplitude_array, self.amplitude_array[i+1])
+        if not in_place:
+            return signal
 
         return
\ No newline at end of file
@@ -0,0 +1,382 @@
+import numpy as np
+import json
+import os
+import struct
+import zlib
+from dsp.signal import Signal
+
+
+class SignalArchive:
+
+    def __init__(self, path):
+        self._path = path
+        self._magic = b'DSPSIGS2'
+        self._header_format = '<8sQ' # Número mágico y tamaño confirmado del archivo, que termina en el trailer vigente
+        self._trailer_format = '<QQQ8s' # Posición y tamaño del segmento del índice, final del segmento anterior y número mágico
+        self._alignment = 64
+        self._compression_level = 6
+        self._index = None
+        self._committed_size = None # Tamaño confirmado cuando se leyó el índice
+
+
+#######################
+## GETTERS & SETTERS ##
+#######################
+
+
+    @property
+    def path(self):
+        return self._path
+
+    @path.setter
+    def path(self, path):
+        self._path = path
+        self._index = None
+
+    @property
+    def compression_level(self):
+        return self._compression_level
+
+    @compression_level.setter
+    def compression_level(self, compression_level):
+        self._compression_level = compression_level
+
+    @property
+    def index(self):
+        if self._index is None or self._committed_size != self.current_committed_size():
+            self._index = self.read_index() # Solo se leen los segmentos que otro escritor haya agregado
+
+        return self._index
+
+    @property
+    def names(self):
+        return list(self.index)
+
+
+#############
+## METHODS ##
+#############
+
+
+    def __len__(self):
+        return len(self.index)
+
+
+    def __contains__(self, name):
+        return name in self.index
+
+
+    def read_committed_size(self, file):
+        """
+        Reads the header of an open archive, which gives where its current trailer ends. Bytes after it belong to an append that did not finish and are ignored.
+
+        Args:
+            file (file object) Archive opened in binary mode.
+
+        Returns:
+            (int) Committed size of the file in bytes.
+        """
+
+        file.seek(0)
+        header = file.read(struct.calcsize(self._header_format))
+
+        if len(header) < struct.calcsize(self._header_format):
+            raise ValueError(f'{self.path} is not a signal archive.')
+
+        magic, committed_size = struct.unpack(self._header_format, header)
+
+        if magic != self._magic:
+            raise ValueError(f'{self.path} is not a signal archive.')
+
+        return committed_size
+
+
+    def current_committed_size(self):
+        """
+        Reads only the header of the archive file, to tell whether its index changed since it was read.
+
+        Returns:
+            (int) Committed size of the file in bytes, or None if it does not exist.
+        """
+
+        if not os.path.exists(self.path):
+            return None
+
+        with open(self.path, 'rb') as file:
+            return self.read_committed_size(file)
+
+
+    def read_index(self):
+        """
+        Reads the index of the archive. Each append writes an index segment with only its own signals, whose trailer points to the end of the previous segment, so the index is the union of the chain of segments, newer ones taking precedence. If the index was already read, only the segments appended since then are read. The arrays are never read.
+
+        Returns:
+            (dict) Entry of each signal by name, with its metadata and the location of its arrays. It is empty if the file does not exist.
+        """
+
+        if not os.path.exists(self.path):
+            self._committed_size = None
+
+            return {}
+
+        trailer_size = struct.calcsize(self._trailer_format)
+        known_size = self._committed_size if self._index is not None else None
+        segments = []
+
+        with open(self.path, 'rb') as file:
+            committed_size = self.read_committed_size(file)
+            segment_end = committed_size
+
+            while segment_end != 0 and segment_end != known_size: # Se recorre la cadena hasta el último segmento ya leído
+                file.seek(segment_end - trailer_size)
+                segment_offset, segment_size, previous_end, magic = struct.unpack(self._trailer_format, file.read(trailer_size))
+
+                if magic != self._magic:
+                    raise ValueError(f'{self.path} is not a signal archive.')
+
+                file.seek(segment_offset)
+                segments.append(json.loads(file.read(segment_size).decode('utf-8')))
+                segment_end = previous_end
+
+        index = dict(self._index) if segment_end != 0 else {}
+
+        for segment in reversed(segments):
+            index.update(segment)
+
+        self._committed_size = committed_size
+
+        return index
+
+
+    def append(self, signals, compress = False):
+        """
+        Adds signals to the archive. Their arrays are written after the current trailer, followed by an index segment with only these signals and its trailer, and only then the header is updated to point to them. The stored bytes are never rewritten, so if the append fails the archive keeps its previous contents, and each append only adds its own records. A name that is already in the archive points to the new signal afterwards, and the space of the replaced one is reclaimed by compact().
+
+        Args:
+            signals (dict) Signals to store by name.
+            compress (bool or collection of string, optional) Whether to compress the arrays with zlib, for every signal, or the names of the signals to compress. Compressed arrays are smaller, but they are read and decompressed as a whole instead of being memory-mapped. The default is False.
+
+        Returns:
+            None.
+        """
+
+        index = dict(self.index)
+        is_new = not os.path.exists(self.path)
+
+        with open(self.path, 'wb' if is_new else 'r+b') as file:
+            if is_new:
+                committed_size = struct.calcsize(self._header_format)
+                previous_end = 0
+                file.write(struct.pack(self._header_format, self._magic, 0)) # Sin trailer confirmado hasta terminar
+            else:
+                committed_size = self.read_committed_size(file)
+                previous_end = committed_size
+
+            file.seek(committed_size) # Los segmentos vigentes quedan intactos
+
+            try:
+                segment = {}
+
+                for name, signal in signals.items():
+                    metadata, arrays = signal.get_record()
+                    is_compressed = compress if isinstance(compress, bool) else name in compress
+                    entry = {'metadata': metadata, 'arrays': {}}
+
+                    for array_name, array in arrays.items():
+                        entry['arrays'][array_name] = self.write_array(file, array, is_compressed)
+
+                    segment[name] = entry
+
+                new_size = self.write_segment(file, segment, previous_end)
+                file.flush()
+                os.fsync(file.fileno())
+            except BaseException:
+                file.truncate(committed_size)
+
+                if is_new:
+                    file.close()
+                    os.remove(self.path)
+
+                raise
+
+            file.seek(0)
+            file.write(struct.pack(self._header_format, self._magic, new_size)) # Confirma el nuevo segmento
+            file.truncate(new_size)
+
+        index.update(segment)
+        self._index = index
+        self._committed_size = new_size
+
+        return
+
+
+    def compact(self):
+        """
+        Rewrites the archive with only the arrays of its current signals and a single index segment, which reclaims the space of replaced signals and merges the segments of many small appends. The arrays are copied as stored, without decompressing them. The new file is written next to the old one and then replaces it, so the archive stays valid if it fails.
+
+        Returns:
+            None.
+        """
+
+        index = self.index
+
+        if not os.path.exists(self.path):
+            return
+
+        temporary_path = f'{self.path}.{os.getpid()}.tmp'
+        compacted_index = {}
+
+        try:
+            with open(self.path, 'rb') as source, open(temporary_path, 'wb') as file:
+                file.write(struct.pack(self._header_format, self._magic, 0))
+
+                for name, entry in index.items():
+                    compacted_entry = {'metadata': entry['metadata'], 'arrays': {}}
+
+                    for array_name, array_entry in entry['arrays'].items():
+                        source.seek(array_entry['offset'])
+                        offset = self.write_data(file, source.read(array_entry['size']))
+                        compacted_entry['arrays'][array_name] = dict(array_entry, offset = offset)
+
+                    compacted_index[name] = compacted_entry
+
+                new_size = self.write_segment(file, compacted_index, 0)
+                file.seek(0)
+                file.write(struct.pack(self._header_format, self._magic, new_size))
+                file.flush()
+                os.fsync(file.fileno())
+
+            os.replace(temporary_path, self.path) # Reemplazo atómico del archivo completo
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+            raise
+
+        self._index = compacted_index
+        self._committed_size = new_size
+
+        return
+
+
+    def write_segment(self, file, segment, previous_end):
+        """
+        Writes an index segment and its trailer at the current position of a file.
+
+        Args:
+            file (file object) File opened for writing in binary mode.
+            segment (dict) Entries of the signals written by the append.
+            previous_end (int) End of the previous segment, or 0 if it is the first one.
+
+        Returns:
+            (int) Position where the trailer ends, which is the new committed size.
+        """
+
+        segment_bytes = json.dumps(segment).encode('utf-8')
+        segment_offset = file.tell()
+        file.write(segment_bytes)
+        file.write(struct.pack(self._trailer_format, segment_offset, len(segment_bytes), previous_end, self._magic))
+
+        return file.tell()
+
+
+    def write_data(self, file, data):
+        """
+        Writes raw bytes at the current position of a file, after aligning it so an array stored in them can be memory-mapped.
+
+        Args:
+            file (file object) File opened for writing in binary mode.
+            data (bytes) Bytes to write.
+
+        Returns:
+            (int) Position of the first written byte.
+        """
+
+        padding = -file.tell() % self._alignment
+        file.write(b'\0' * padding)
+        offset = file.tell()
+        file.write(data)
+
+        return offset
+
+
+    def write_array(self, file, array, compress = False):
+        """
+        Writes the raw bytes of an array at the current position of a file, aligned so it can be memory-mapped.
+
+        Args:
+            file (file object) File opened for writing in binary mode.
+            array (numpy.ndarray) Array to write.
+            compress (bool, optional) Whether to compress the bytes with zlib. The default is False.
+
+        Returns:
+            (dict) Location and layout of the written array, as stored in the index.
+        """
+
+        array = np.ascontiguousarray(array)
+        data = array.tobytes()
+
+        if compress:
+            data = zlib.compress(data, self.compression_level)
+
+        entry = {
+            'offset': self.write_data(file, data),
+            'size': len(data),
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'compressed': compress
+        }
+
+        return entry
+
+
+    def read_array(self, entry, mmap_mode = 'r'):
+        """
+        Reads an array of the archive, touching only its own bytes.
+
+        Args:
+            entry (dict) Location and layout of the array, as stored in the index.
+            mmap_mode (string, optional) Memory-map mode for uncompressed arrays, such as 'r' or 'c'. If None, the array is read into RAM. The default is 'r'.
+
+        Returns:
+            (numpy.ndarray) The array, which is a numpy.memmap if it is uncompressed and mmap_mode is given.
+        """
+
+        dtype = np.dtype(entry['dtype'])
+        shape = tuple(entry['shape'])
+
+        if not entry['compressed'] and mmap_mode is not None and 0 < entry['size']:
+            return np.memmap(self.path, dtype = dtype, mode = mmap_mode, offset = entry['offset'], shape = shape)
+
+        with open(self.path, 'rb') as file:
+            file.seek(entry['offset'])
+            data = file.read(entry['size'])
+
+        if entry['compressed']:
+            data = zlib.decompress(data)
+
+        return np.frombuffer(data, dtype = dtype).reshape(shape).copy()
+
+
+    def load(self, name, mmap_mode = 'r'):
+        """
+        Loads one signal of the archive by name.
+
+        Args:
+            name (string) Name of the signal.
+            mmap_mode (string, optional) Memory-map mode for uncompressed arrays. If None, the arrays are read into RAM. The default is 'r'.
+
+        Returns:
+            (Signal) The stored signal, with its metadata.
+        """
+
+        if name not in self.index:
+            raise KeyError(f'There is no signal named {name!r} in {self.path}.')
+
+        entry = self.index[name]
+        arrays = {array_name: self.read_array(array_entry, mmap_mode) for array_name, array_entry in entry['arrays'].items()}
+
+        signal = Signal()
+        signal.set_record(entry['metadata'], arrays)
+
+        return signal
\ No newline at end of file
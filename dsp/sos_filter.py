@@ -0,0 +1,81 @@
+import numpy as np
+
+
+class SOSFilter:
+
+    def __init__(self, sos_bank):
+        self._sos_bank = sos_bank
+        self.reset()
+
+
+#######################
+## GETTERS & SETTERS ##
+#######################
+
+
+    @property
+    def sos_bank(self):
+        return self._sos_bank
+
+    @sos_bank.setter
+    def sos_bank(self, sos_bank):
+        self._sos_bank = sos_bank
+        self.reset()
+
+    @property
+    def zi_bank(self):
+        return self._zi_bank
+
+    @property
+    def is_bank(self):
+        return not (isinstance(self._sos_bank, np.ndarray) and self._sos_bank.ndim == 2)
+
+
+#############
+## METHODS ##
+#############
+
+
+    def reset(self):
+        """
+        Clears the state of the filters, as if no sample had been processed.
+
+        Returns:
+            None.
+        """
+
+        self._zi_bank = None
+
+        return
+
+
+    def process(self, block):
+        """
+        Filters a block of samples with every filter of the bank, carrying the state of each one to the next call. Since the initial state is zero, as in signal.sosfilt(), filtering a long input block by block gives exactly the same output as filtering it at once.
+
+        Args:
+            block (numpy.ndarray) Block of samples. A block of shape (channels, samples) is filtered channel by channel; the amount of channels must not change until reset() is called.
+
+        Returns:
+            (numpy.ndarray) Filtered block. For a bank its shape is (bands,) + block.shape, for a single array of second-order sections it is block.shape.
+        """
+
+        from scipy import signal
+
+        block = np.asarray(block, dtype = float)
+        sos_bank = self.sos_bank if self.is_bank else [self.sos_bank]
+
+        if self._zi_bank is None:
+            self._zi_bank = [np.zeros((sos.shape[0],) + block.shape[:-1] + (2,)) for sos in sos_bank]
+        elif self._zi_bank[0].shape[1:-1] != block.shape[:-1]:
+            raise ValueError('The amount of channels of the block changed. Call reset() before processing a different input.')
+
+        filtered_block = np.empty((len(sos_bank),) + block.shape)
+
+        for i in range(0, len(sos_bank), 1):
+            filtered_block[i], self._zi_bank[i] = signal.sosfilt(sos_bank[i], block, axis = -1, zi = self._zi_bank[i])
+
+        if not self.is_bank:
+            return filtered_block[0]
+
+        return filtered_block
\ No newline at end of file
@@ -0,0 +1,153 @@
+import numpy as np
+from dsp.filter import fft
+
+
+class STFT:
+
+    def __init__(self, sampling_rate = 48000, frame_size = 2048, hop_size = 512, nfft = None, window = 'hann'):
+        self._sampling_rate = sampling_rate
+        self._frame_size = frame_size
+        self._hop_size = hop_size
+        self._nfft = nfft
+        self._window = window
+        self.reset()
+
+
+#######################
+## GETTERS & SETTERS ##
+#######################
+
+
+    @property
+    def sampling_rate(self):
+        return self._sampling_rate
+
+    @sampling_rate.setter
+    def sampling_rate(self, sampling_rate):
+        self._sampling_rate = sampling_rate
+
+    @property
+    def frame_size(self):
+        return self._frame_size
+
+    @frame_size.setter
+    def frame_size(self, frame_size):
+        self._frame_size = frame_size
+
+    @property
+    def hop_size(self):
+        return self._hop_size
+
+    @hop_size.setter
+    def hop_size(self, hop_size):
+        self._hop_size = hop_size
+
+    @property
+    def nfft(self):
+        if self._nfft is None:
+            return self._frame_size
+
+        return self._nfft
+
+    @nfft.setter
+    def nfft(self, nfft):
+        self._nfft = nfft
+
+    @property
+    def window(self):
+        return self._window
+
+    @window.setter
+    def window(self, window):
+        self._window = window
+
+    @property
+    def frequency_array(self):
+        return np.fft.rfftfreq(self.nfft, 1 / self.sampling_rate)
+
+    @property
+    def time_step(self):
+        return self.hop_size / self.sampling_rate
+
+    @property
+    def time_start(self):
+        return self.frame_size / (2 * self.sampling_rate) # Cada trama se ubica en su centro
+
+    @property
+    def frame_count(self):
+        return self._frame_count
+
+
+#############
+## METHODS ##
+#############
+
+
+    def reset(self):
+        self._carry = np.array([]) # Muestras que todavía forman parte de tramas futuras
+        self._frame_count = 0
+
+        return
+
+
+    def process(self, block):
+        """
+        Consumes a block of samples of any length and transforms every frame that is completed. The samples needed by the next frames are carried to the following call, so the result does not depend on how the input is split.
+
+        Args:
+            block (numpy.ndarray) 1D block of samples.
+
+        Returns:
+            (numpy.ndarray) Float32 magnitudes of shape (frames, bins), with one row per completed frame. It may have no rows.
+        """
+
+        if self.hop_size <= 0 or self.frame_size <= 0:
+            raise ValueError('The parameters frame_size and hop_size must be positive.')
+
+        buffer = np.concatenate((self._carry, np.asarray(block, dtype = float)))
+        number_of_bins = self.nfft // 2 + 1
+
+        if len(buffer) < self.frame_size:
+            self._carry = buffer
+
+            return np.empty((0, number_of_bins), dtype = np.float32)
+
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, self.frame_size)[::self.hop_size] # Vistas, sin copiar muestras
+        X_magnitude = fft(frames, self.sampling_rate, n = self.nfft, window = self.window)[1].astype(np.float32)
+
+        self._carry = buffer[len(frames) * self.hop_size:]
+        self._frame_count = self._frame_count + len(frames)
+
+        return X_magnitude
+
+
+    def compute(self, source, out = None):
+        """
+        Computes the spectrogram of a whole source, consuming it block by block.
+
+        Args:
+            source (iterable of numpy.ndarray) Blocks of samples, such as a Stream, Signal.iter_blocks() or Oscillator.blocks().
+            out (numpy.ndarray, optional) Preallocated float32 array, which may be a numpy.memmap, with enough rows for every frame. Frames are written into it as they are computed, so long spectrograms never need to fit in RAM. The default is None.
+
+        Returns:
+            (numpy.ndarray) Float32 magnitudes of shape (frames, bins). If out is given, it is the view of out with the computed rows.
+        """
+
+        self.reset()
+        spectrogram_blocks = []
+
+        for block in source:
+            X_magnitude = self.process(block)
+
+            if out is None:
+                spectrogram_blocks.append(X_magnitude)
+            else:
+                out[self._frame_count - len(X_magnitude):self._frame_count] = X_magnitude
+
+        if out is not None:
+            return out[:self._frame_count]
+
+        if not spectrogram_blocks:
+            return np.empty((0, self.nfft // 2 + 1), dtype = np.float32)
+
+        return np.concatenate(spectrogram_blocks)
\ No newline at end of file
@@ -0,0 +1,149 @@
+import numpy as np
+import os
+
+
+class Stream:
+
+    def __init__(self, source, block_size = 4096, hop_size = None, sampling_rate = 48000, pad_last = False):
+        self._source = source
+        self._block_size = block_size
+        self._hop_size = hop_size
+        self._sampling_rate = sampling_rate
+        self._pad_last = pad_last
+
+
+#######################
+## GETTERS & SETTERS ##
+#######################
+
+
+    @property
+    def source(self):
+        return self._source
+
+    @source.setter
+    def source(self, source):
+        self._source = source
+
+    @property
+    def block_size(self):
+        return self._block_size
+
+    @block_size.setter
+    def block_size(self, block_size):
+        self._block_size = block_size
+
+    @property
+    def hop_size(self):
+        if self._hop_size is None:
+            return self._block_size
+
+        return self._hop_size
+
+    @hop_size.setter
+    def hop_size(self, hop_size):
+        self._hop_size = hop_size
+
+    @property
+    def sampling_rate(self):
+        return self._sampling_rate
+
+    @sampling_rate.setter
+    def sampling_rate(self, sampling_rate):
+        self._sampling_rate = sampling_rate
+
+    @property
+    def pad_last(self):
+        return self._pad_last
+
+    @pad_last.setter
+    def pad_last(self, pad_last):
+        self._pad_last = pad_last
+
+    @property
+    def overlap_size(self):
+        return max(self.block_size - self.hop_size, 0)
+
+
+#############
+## METHODS ##
+#############
+
+
+    def __iter__(self):
+        """
+        Iterates over the source in blocks of block_size samples, whose starts are hop_size samples apart. Blocks are taken along the last axis, so a 2D source of shape (channels, samples) yields multi-channel blocks.
+
+        The source may be a numpy.ndarray, the path to a .npy file (which is memory-mapped, so only the pages of the current block are read) or an iterable of arrays of any length, such as a generator, that is re-chunked on the fly.
+
+        Yields:
+            (numpy.ndarray) Block of samples. The last one is shorter than block_size unless pad_last is True, in which case it is completed with zeros.
+        """
+
+        if self.block_size <= 0 or self.hop_size <= 0:
+            raise ValueError('The parameters block_size and hop_size must be positive.')
+
+        source = self.source
+
+        if isinstance(source, (str, os.PathLike)):
+            source = np.load(source, mmap_mode = 'r')
+
+        if isinstance(source, np.ndarray):
+            return self._array_blocks(source)
+
+        return self._iterable_blocks(source)
+
+
+    def is_overlapped(self):
+        return self.hop_size < self.block_size
+
+
+    def _array_blocks(self, array):
+        number_of_samples = array.shape[-1]
+        start = 0
+
+        while start < number_of_samples and (start == 0 or start + self.overlap_size < number_of_samples):
+            yield self._pad(np.asarray(array[..., start:start + self.block_size]))
+            start = start + self.hop_size
+
+
+    def _iterable_blocks(self, iterable):
+        buffer = None
+        skip = 0 # Muestras a descartar cuando hop_size > block_size
+        new_samples = 0 # Muestras del buffer que todavía no salieron en ningún bloque
+        is_first_block = True
+
+        for chunk in iterable:
+            chunk = np.asarray(chunk)
+
+            if skip:
+                dropped = min(skip, chunk.shape[-1])
+                chunk = chunk[..., dropped:]
+                skip = skip - dropped
+
+            if buffer is None:
+                buffer = chunk
+            else:
+                buffer = np.concatenate((buffer, chunk), axis = -1)
+
+            new_samples = new_samples + chunk.shape[-1]
+
+            while self.block_size <= buffer.shape[-1]:
+                yield buffer[..., :self.block_size]
+                is_first_block = False
+                new_samples = max(buffer.shape[-1] - max(self.block_size, self.hop_size), 0)
+                skip = max(self.hop_size - buffer.shape[-1], 0)
+                buffer = buffer[..., self.hop_size:]
+
+        if buffer is not None and 0 < buffer.shape[-1] and (is_first_block or 0 < new_samples):
+            yield self._pad(buffer)
+
+
+    def _pad(self, block):
+        missing = self.block_size - block.shape[-1]
+
+        if self.pad_last and 0 < missing:
+            padding = [(0, 0)] * (block.ndim - 1) + [(0, missing)]
+            block = np.pad(block, padding)
+
+        return block
\ No newline at end of file
@@ -1,5 +1,5 @@
 import numpy as np
-from dsp.functions import to_list
+from dsp.functions import to_list, round_significant
 
 
 class Ticks:
@@ -17,7 +17,7 @@ class Ticks:
 
     def sinewave_labels(self, frequency, number_of_periods = 1):
 
-        return self.sinewave_ticks(frequency, number_of_periods) * 1000
+        return round_significant(self.sinewave_ticks(frequency, number_of_periods) * 1000, 3)
 
 
     def degrees_ticks(self, interval = 30):